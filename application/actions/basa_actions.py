@@ -1,6 +1,7 @@
 import logging
 from domain.login_interface import LoginStrategy
 from infrastructure.executors.action_executor import ActionExecutor
+from infrastructure.executors.teclado_virtual import TecladoVirtual
 
 class BasaActions(LoginStrategy):
     def __init__(self, credentials, selectors, flow,contexto):
@@ -40,24 +41,6 @@ class BasaActions(LoginStrategy):
     async def ingresar_password_virtual(self, page, password):
         await page.wait_for_selector('[data-valor]', timeout=10000)
 
-        for char in password:
-            teclas = await page.query_selector_all('[data-valor]')
-            encontrada = False
-
-            for tecla in teclas:
-                texto = await tecla.inner_text()
-                texto = texto.strip()
-
-                self.logger.debug(f"[🔎] Visible: '{texto}' esperando: '{char}'")
-
-                if texto == char:
-                    await tecla.click()
-                    self.logger.info(f"🟢 Presionada: {char}")
-                    encontrada = True
-                    await page.wait_for_timeout(50)
-                    break
-
-            if not encontrada:
-                visibles = [(await t.inner_text()).strip() for t in teclas]
-                self.logger.error(f"❌ No se encontró tecla con valor visible: {char} | Teclas visibles: {visibles}")
-                raise Exception(f"❌ No se pudo ingresar el carácter: {char}")
+        teclado = TecladoVirtual(page, '[data-valor]')
+        await teclado.ingresar(password)
+        self.logger.info("🟢 Contraseña virtual ingresada.")
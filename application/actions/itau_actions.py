@@ -1,5 +1,6 @@
 import logging
 from infrastructure.executors.action_executor import ActionExecutor
+from infrastructure.executors.teclado_virtual import TecladoVirtual
 
 class ItauActions:
     def __init__(self, credentials, selectors, flow,contexto):
@@ -37,22 +38,6 @@ class ItauActions:
 
         await page.wait_for_selector('#teclado_borrar', timeout=10000)
 
-        for char in password:
-            encontrada = False
-            teclas = await page.query_selector_all('ul#tecladoBoxDivIdDefault_numeros > li.numeros')
-
-            for tecla in teclas:
-                texto = await tecla.inner_text()
-                texto = texto.strip()
-
-                if texto == char:
-                    await tecla.click()
-                    self.logger.info(f"🟢 Presionado: {char}")
-                    encontrada = True
-                    await page.wait_for_timeout(100)  # Delay entre clics
-                    break
-
-            if not encontrada:
-                visibles = [(await t.inner_text()).strip() for t in teclas]
-                self.logger.error(f"❌ No se encontró tecla con valor: {char} | Visibles: {visibles}")
-                raise Exception(f"❌ Fallo al ingresar dígito: {char}")
+        teclado = TecladoVirtual(page, 'ul#tecladoBoxDivIdDefault_numeros > li.numeros')
+        await teclado.ingresar(password)
+        self.logger.info("🟢 PIN virtual ingresado.")
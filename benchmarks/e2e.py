@@ -0,0 +1,166 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from benchmarks.portales_mock import BANCOS_MOCK, PortalesMock, moneda_cuenta
+
+# Benchmark de punta a punta: BankProcessor real contra los portales locales.
+# Uso: python -m benchmarks.e2e --bancos gnb basa atlas --cuentas 10 --latencia 50 --repeticiones 3
+
+CREDENCIALES_MOCK = {"RUC": "80000000-1", "USER": "usuario", "USER2": "1234567", "PASS": "1357"}
+
+def preparar_entorno(directorio: str, portales: PortalesMock, bancos: list):
+    # Se trabaja en un directorio temporal: storage/, manifests y cookies no tocan los reales
+    shutil.copytree(os.path.join(RAIZ, "flows"), os.path.join(directorio, "flows"))
+    filas = [
+        {"BANCO": banco.upper(), "NROCUENTA": nro, "TIPOCUENTA": "CC", "MONEDA": moneda_cuenta(nro)}
+        for banco in bancos for nro in portales.cuentas[banco]
+    ]
+    ruta_excel = os.path.join(directorio, "cuentas.xlsx")
+    pd.DataFrame(filas).to_excel(ruta_excel, sheet_name="CUENTAS", index=False)
+
+    os.environ["RUTA_EXCEL"] = ruta_excel
+    os.environ["BASE_DIR"] = os.path.join(directorio, "extractos")
+    os.environ["METRICAS_DIR"] = os.path.join(directorio, "metrics")
+    for banco in bancos:
+        os.environ[f"{banco.upper()}_URL"] = portales.url_login(banco)
+        for clave, valor in CREDENCIALES_MOCK.items():
+            os.environ[f"{banco.upper()}_{clave}"] = valor
+    os.chdir(directorio)
+
+def limpiar_estado():
+    # Cada repetición parte sin manifest ni sesión guardada para medir la corrida completa
+    for carpeta in (os.path.join("storage", "manifests"), os.path.join("storage", "cookies"), os.environ["BASE_DIR"]):
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+async def medir_banco(banco: str, pool) -> dict:
+    from infrastructure.executors.bank_processor import BankProcessor
+
+    inicio = time.perf_counter()
+    processor = await asyncio.to_thread(BankProcessor, banco, pool=pool)
+    exito = await processor.ejecutar()
+    duracion = time.perf_counter() - inicio
+
+    reporte = {}
+    if processor.ruta_reporte:
+        with open(processor.ruta_reporte, "r", encoding="utf-8") as file:
+            reporte = json.load(file)
+    pasos = 0
+    ruta_metricas = (reporte.get("metricas") or {}).get("json")
+    if ruta_metricas:
+        with open(ruta_metricas, "r", encoding="utf-8") as file:
+            pasos = len(json.load(file).get("pasos", []))
+
+    return {
+        "exito": bool(exito),
+        "error": str(processor.error) if processor.error else None,
+        "duracion_s": round(duracion, 3),
+        "pasos": pasos,
+        "pasos_por_s": round(pasos / duracion, 2) if duracion else 0.0,
+        "descargas": len(reporte.get("post_descarga", [])),
+        "fases_ms": reporte.get("fases_ms", {}),
+    }
+
+def resumir(corridas: list) -> dict:
+    duraciones = [c["duracion_s"] for c in corridas]
+    fases = {}
+    for corrida in corridas:
+        for fase, ms in corrida["fases_ms"].items():
+            fases.setdefault(fase, []).append(ms)
+    return {
+        "exitos": sum(c["exito"] for c in corridas),
+        "repeticiones": len(corridas),
+        "duracion_s": {
+            "mediana": round(statistics.median(duraciones), 3),
+            "min": min(duraciones),
+            "max": max(duraciones),
+        },
+        "pasos_por_s": round(statistics.median(c["pasos_por_s"] for c in corridas), 2),
+        "fases_ms": {fase: round(statistics.median(valores), 1) for fase, valores in fases.items()},
+    }
+
+async def ejecutar_benchmark(args) -> dict:
+    from infrastructure.logger.logging_config import setup_logging
+    from infrastructure.browser.browser_pool import BrowserPool
+    setup_logging()
+
+    # Navegador caliente entre repeticiones: se mide el flujo, no el arranque de Chromium
+    pool = BrowserPool(headless=not args.ver, max_navegadores=1, reciclar_despues_de=1000)
+    await pool.iniciar()
+    corridas = {banco: [] for banco in args.bancos}
+    try:
+        for repeticion in range(1, args.repeticiones + 1):
+            for banco in args.bancos:
+                limpiar_estado()
+                resultado = await medir_banco(banco, pool)
+                corridas[banco].append(resultado)
+                estado = "✅" if resultado["exito"] else "❌"
+                print(f"{estado} {banco.upper()} #{repeticion}: {resultado['duracion_s']:.2f}s, "
+                      f"{resultado['pasos']} pasos ({resultado['pasos_por_s']}/s), {resultado['descargas']} descargas")
+    finally:
+        await pool.cerrar()
+
+    return {banco: {"resumen": resumir(lista), "corridas": lista} for banco, lista in corridas.items()}
+
+def imprimir_tabla(resultados: dict):
+    print(f"\n{'BANCO':<8} {'OK':>5} {'MEDIANA s':>10} {'MIN s':>8} {'MAX s':>8} {'PASOS/s':>8}  FASES (ms, mediana)")
+    for banco, datos in resultados.items():
+        r = datos["resumen"]
+        fases = ", ".join(f"{fase}={ms:.0f}" for fase, ms in r["fases_ms"].items())
+        print(f"{banco.upper():<8} {r['exitos']:>2}/{r['repeticiones']:<2} {r['duracion_s']['mediana']:>10.2f} "
+              f"{r['duracion_s']['min']:>8.2f} {r['duracion_s']['max']:>8.2f} {r['pasos_por_s']:>8.2f}  {fases}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de punta a punta contra portales locales")
+    parser.add_argument("--bancos", nargs="+", default=list(BANCOS_MOCK), choices=BANCOS_MOCK)
+    parser.add_argument("--cuentas", type=int, default=5, help="Cuentas por banco en el portal")
+    parser.add_argument("--latencia", type=float, default=0, help="Latencia por request en ms")
+    parser.add_argument("--movimientos", type=int, default=60, help="Filas por extracto generado")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--ver", action="store_true", help="Navegador visible")
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    parser.add_argument("--conservar", action="store_true", help="No borra el directorio de trabajo")
+    args = parser.parse_args()
+    salida = os.path.abspath(args.salida) if args.salida else None
+
+    cuentas = {banco: [10000001 + indice * 7 for indice in range(args.cuentas)] for banco in args.bancos}
+    portales = PortalesMock(cuentas, latencia_ms=args.latencia, movimientos=args.movimientos).iniciar()
+    directorio = tempfile.mkdtemp(prefix="fenix_bench_")
+    origen = os.getcwd()
+    try:
+        preparar_entorno(directorio, portales, args.bancos)
+        inicio = time.perf_counter()
+        resultados = asyncio.run(ejecutar_benchmark(args))
+        total = time.perf_counter() - inicio
+    finally:
+        portales.cerrar()
+        os.chdir(origen)
+        if not args.conservar:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    imprimir_tabla(resultados)
+    print(f"\nTiempo total: {total:.2f}s | descargas servidas: {portales.descargas}")
+
+    if salida:
+        with open(salida, "w", encoding="utf-8") as file:
+            json.dump({
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "parametros": {k: v for k, v in vars(args).items() if k != "salida"},
+                "resultados": resultados,
+            }, file, ensure_ascii=False, indent=2)
+        print(f"📄 Resultados: {salida}")
+
+if __name__ == "__main__":
+    main()
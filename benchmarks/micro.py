@@ -0,0 +1,365 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+# Microbenchmarks de las piezas en Python puro que escalan con cuentas y pasos.
+# Uso:
+#   python -m benchmarks.micro [ejecutar]           -> ejecuta e imprime
+#   python -m benchmarks.micro guardar [nombre]     -> guarda baselines/<nombre>.json
+#   python -m benchmarks.micro comparar [base] [otro] -> compara contra un baseline (sale con 1 si hay regresiones)
+# baselines/baseline.json es la corrida de referencia versionada, usada por defecto.
+# Todos aceptan --solo <texto...> para filtrar casos.
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+UMBRAL_REGRESION = 15.0  # % de empeoramiento de la mediana que se considera regresión
+
+MICROBENCHMARKS = {}
+
+def micro(nombre: str, operaciones: int = 1, rondas: int = 7):
+    """Registra una función que prepara el caso y devuelve el callable a medir."""
+    def decorador(preparar):
+        MICROBENCHMARKS[nombre] = (preparar, operaciones, rondas)
+        return preparar
+    return decorador
+
+# ---------------------------------------------------------------- Datos sintéticos
+
+def cuentas_sinteticas(cantidad: int, banco: str = "GNB") -> list:
+    return [
+        {"BANCO": banco, "NROCUENTA": str(10000000 + i), "TIPOCUENTA": "CC" if i % 2 else "CA", "MONEDA": "GS" if i % 3 else "USD"}
+        for i in range(cantidad)
+    ]
+
+class _ElementoFalso:
+    async def scroll_into_view_if_needed(self):
+        pass
+
+    async def click(self, **kwargs):
+        pass
+
+class _TecladoFalso:
+    async def press(self, tecla):
+        pass
+
+class PaginaFalsa:
+    """Página sin navegador: todas las operaciones resuelven al instante."""
+
+    def __init__(self):
+        self.keyboard = _TecladoFalso()
+        self.url = "http://localhost/"
+        self._elemento = _ElementoFalso()
+
+    async def wait_for_selector(self, selector, **kwargs):
+        return self._elemento
+
+    async def wait_for_function(self, *args, **kwargs):
+        return True
+
+    async def fill(self, selector, value):
+        pass
+
+    async def click(self, selector, **kwargs):
+        pass
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+def _executor():
+    from infrastructure.executors.action_executor import ActionExecutor
+    from utils.config import load_selectors
+
+    executor = ActionExecutor(PaginaFalsa(), load_selectors()["gnb"], {"url": "http://localhost", "ruc": "80000000-1", "user": "u", "password": "p"})
+    executor.set_contexto(cuentas=cuentas_sinteticas(10), fecha_inicio="2025-01-01", fecha_fin="2025-01-31", ruta_descarga="x.xlsx")
+    return executor
+
+PASOS_DESCARGA = [
+    {"action": "click", "target": "step_3.button_estracto"},
+    {"action": "click", "target": "step_3.button_desplegar_fecha"},
+    {"action": "fill", "target": "step_3.select_inicio", "value": "$fecha_inicio"},
+    {"action": "fill", "target": "step_3.select_fin", "value": "$fecha_fin"},
+    {"action": "keyboard_press", "value": "Enter"},
+]
+
+# ---------------------------------------------------------------- Casos
+
+@micro("execute_step", operaciones=1000)
+def _execute_step():
+    executor = _executor()
+    loop = asyncio.new_event_loop()
+
+    async def lote():
+        for indice in range(1000):
+            await executor.execute_step(PASOS_DESCARGA[indice % len(PASOS_DESCARGA)])
+
+    return lambda: loop.run_until_complete(lote())
+
+@micro("ejecutar_paso_compilado", operaciones=1000)
+def _ejecutar_paso_compilado():
+    from infrastructure.executors.flow_compiler import compilar_flujo
+
+    executor = _executor()
+    pasos = compilar_flujo(PASOS_DESCARGA, executor.selectors)
+    loop = asyncio.new_event_loop()
+
+    async def lote():
+        for indice in range(1000):
+            await executor.ejecutar_paso(pasos[indice % len(pasos)])
+
+    return lambda: loop.run_until_complete(lote())
+
+@micro("resolve_variable", operaciones=100000)
+def _resolve_variable():
+    executor = _executor()
+    valores = ["$fecha_inicio", "$ruc", "$ruta_descarga", "literal"]
+
+    def correr():
+        for indice in range(100000):
+            executor.resolve_variable(valores[indice & 3])
+    return correr
+
+@micro("_parse_value", operaciones=100000)
+def _parse_value():
+    executor = _executor()
+    valores = ["$fecha_inicio", "$ruc", "$ruta_descarga", "literal"]
+
+    def correr():
+        for indice in range(100000):
+            executor._parse_value(valores[indice & 3])
+    return correr
+
+@micro("get_selector", operaciones=100000)
+def _get_selector():
+    executor = _executor()
+    rutas = ["step_1.ruc_input", "step_3.excel_export_button", "step_2.list_selector", "step_9.inexistente"]
+
+    def correr():
+        for indice in range(100000):
+            executor.get_selector(rutas[indice & 3])
+    return correr
+
+@micro("generar_clave_cuenta", operaciones=100000)
+def _generar_clave_cuenta():
+    from services.ruta_service import generar_clave_cuenta
+
+    cuentas = cuentas_sinteticas(10000)
+
+    def correr():
+        for _ in range(10):
+            for cuenta in cuentas:
+                generar_clave_cuenta(cuenta)
+    return correr
+
+@micro("generar_ruta_archivo", operaciones=10000)
+def _generar_ruta_archivo():
+    from services.ruta_service import generar_ruta_archivo
+
+    cuentas = cuentas_sinteticas(10000)
+    fecha = datetime(2025, 1, 31)
+
+    def correr():
+        for cuenta in cuentas:
+            generar_ruta_archivo("base", "gnb", "EXTRACTO", cuenta["TIPOCUENTA"], cuenta["NROCUENTA"], cuenta["MONEDA"], fecha=fecha, crear_directorio=False)
+    return correr
+
+@micro("set_contexto_10k", operaciones=1)
+def _set_contexto():
+    executor = _executor()
+    contexto = {"cuentas": cuentas_sinteticas(10000), "fecha_inicio": "2025-01-01", "fecha_fin": "2025-01-31"}
+    return lambda: executor.set_contexto(**contexto)
+
+@micro("normalizar_importes_10k", operaciones=1)
+def _normalizar_importes():
+    import pandas as pd
+    from services.normalizador_service import PerfilExtracto, _a_numero
+
+    perfil = PerfilExtracto()
+    # Celdas numéricas (con y sin decimales) y texto con separadores, como llegan de read_excel(dtype=object)
+    muestra = pd.Series([1234.5, None, 10000.0, 7, "1.234,50", "(500)", "12,5-", "x"], dtype=object)
+    esperado = [1234.5, None, 10000.0, 7.0, 1234.5, -500.0, -12.5, None]
+    obtenido = [None if pd.isna(v) else float(v) for v in _a_numero(muestra, perfil)]
+    assert obtenido == esperado, f"_a_numero: {obtenido} != {esperado}"
+    # Columna solo con montos numéricos con centavos (p. ej. cuenta en USD)
+    solo_numeros = [None if pd.isna(v) else float(v) for v in _a_numero(pd.Series([1234.5, None, 10000.0], dtype=object), perfil)]
+    assert solo_numeros == [1234.5, None, 10000.0], f"_a_numero: {solo_numeros}"
+
+    serie = pd.Series((muestra.tolist() * 1250)[:10000], dtype=object)
+    return lambda: _a_numero(serie, perfil)
+
+class _LibroCuentas:
+    """Excel sintético de cuentas con cache aislado en un directorio temporal."""
+
+    def __init__(self, filas: int):
+        import pandas as pd
+        from services import cuentas_services
+
+        self.modulo = cuentas_services
+        self.directorio = tempfile.mkdtemp(prefix="fenix_micro_")
+        self.ruta = os.path.join(self.directorio, "cuentas.xlsx")
+        bancos = ["GNB", "BASA", "ATLAS", "ITAU"]
+        filas_excel = [dict(c, BANCO=bancos[i % len(bancos)]) for i, c in enumerate(cuentas_sinteticas(filas))]
+        pd.DataFrame(filas_excel).to_excel(self.ruta, sheet_name="CUENTAS", index=False)
+        cuentas_services.RUTA_EXCEL = self.ruta
+        cuentas_services.CACHE_DIR = self.directorio
+        cuentas_services.CACHE_CUENTAS = os.path.join(self.directorio, "cuentas.pkl")
+
+    def olvidar_memoria(self):
+        self.modulo._indice_cuentas = None
+
+    def olvidar_cache(self):
+        self.olvidar_memoria()
+        if os.path.exists(self.modulo.CACHE_CUENTAS):
+            os.remove(self.modulo.CACHE_CUENTAS)
+
+_libros = {}
+
+def _libro() -> _LibroCuentas:
+    filas = int(os.getenv("MICRO_FILAS_CUENTAS", "10000"))
+    if filas not in _libros:
+        _libros[filas] = _LibroCuentas(filas)
+    return _libros[filas]
+
+@micro("obtener_cuentas_excel_frio", operaciones=1, rondas=3)
+def _obtener_cuentas_frio():
+    libro = _libro()
+
+    def correr():
+        libro.olvidar_cache()
+        libro.modulo.obtener_cuentas_por_banco("gnb")
+    return correr
+
+@micro("obtener_cuentas_cache_disco", operaciones=1)
+def _obtener_cuentas_disco():
+    libro = _libro()
+    libro.modulo.obtener_cuentas_por_banco("gnb")
+
+    def correr():
+        libro.olvidar_memoria()
+        libro.modulo.obtener_cuentas_por_banco("gnb")
+    return correr
+
+@micro("obtener_cuentas_memoria", operaciones=100)
+def _obtener_cuentas_memoria():
+    libro = _libro()
+    libro.modulo.obtener_cuentas_por_banco("gnb")
+
+    def correr():
+        for _ in range(100):
+            libro.modulo.obtener_cuentas_por_banco("gnb")
+    return correr
+
+# ---------------------------------------------------------------- Ejecución y baselines
+
+def medir(nombre: str) -> dict:
+    preparar, operaciones, rondas = MICROBENCHMARKS[nombre]
+    funcion = preparar()
+    funcion()  # calentamiento
+    tiempos = []
+    for _ in range(rondas):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) / operaciones * 1e6)
+    return {
+        "operaciones": operaciones,
+        "rondas": rondas,
+        "mediana_us": round(statistics.median(tiempos), 3),
+        "min_us": round(min(tiempos), 3),
+        "max_us": round(max(tiempos), 3),
+    }
+
+def ejecutar(filtro: list = None) -> dict:
+    resultados = {}
+    for nombre in MICROBENCHMARKS:
+        if filtro and not any(f in nombre for f in filtro):
+            continue
+        resultados[nombre] = medir(nombre)
+        r = resultados[nombre]
+        print(f"{nombre:<30} {r['mediana_us']:>12.3f} µs/op  (min {r['min_us']:.3f}, max {r['max_us']:.3f})")
+    for libro in _libros.values():
+        shutil.rmtree(libro.directorio, ignore_errors=True)
+    return resultados
+
+def _entorno() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+    }
+
+def _ruta_baseline(nombre: str) -> str:
+    return nombre if nombre.endswith(".json") else os.path.join(BASELINES_DIR, f"{nombre}.json")
+
+def guardar(nombre: str, resultados: dict) -> str:
+    ruta = _ruta_baseline(nombre)
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as file:
+        json.dump({"entorno": _entorno(), "resultados": resultados}, file, ensure_ascii=False, indent=2)
+    return ruta
+
+def cargar(nombre: str) -> dict:
+    with open(_ruta_baseline(nombre), "r", encoding="utf-8") as file:
+        return json.load(file)
+
+def comparar(base: dict, actual: dict, umbral: float = UMBRAL_REGRESION) -> list:
+    regresiones = []
+    print(f"\n{'MICROBENCHMARK':<30} {'BASE µs':>12} {'ACTUAL µs':>12} {'DELTA':>9}")
+    for nombre, medicion in actual.items():
+        previa = base.get(nombre)
+        if not previa:
+            print(f"{nombre:<30} {'-':>12} {medicion['mediana_us']:>12.3f} {'nuevo':>9}")
+            continue
+        delta = (medicion["mediana_us"] - previa["mediana_us"]) / previa["mediana_us"] * 100 if previa["mediana_us"] else 0.0
+        marca = " ⚠️" if delta > umbral else ""
+        print(f"{nombre:<30} {previa['mediana_us']:>12.3f} {medicion['mediana_us']:>12.3f} {delta:>+8.1f}%{marca}")
+        if delta > umbral:
+            regresiones.append(nombre)
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks de executor y planificación")
+    filtro = argparse.ArgumentParser(add_help=False)
+    filtro.add_argument("--solo", nargs="+", help="Ejecuta solo los microbenchmarks que contengan estos textos")
+    sub = parser.add_subparsers(dest="comando")
+    sub.add_parser("ejecutar", parents=[filtro], help="Ejecuta e imprime (por defecto)")
+    p_guardar = sub.add_parser("guardar", parents=[filtro], help="Ejecuta y guarda un baseline")
+    p_guardar.add_argument("nombre", nargs="?", default="baseline")
+    p_comparar = sub.add_parser("comparar", parents=[filtro], help="Compara contra un baseline")
+    p_comparar.add_argument("base", nargs="?", default="baseline")
+    p_comparar.add_argument("actual", nargs="?", help="Otro baseline; si se omite se ejecuta ahora")
+    p_comparar.add_argument("--umbral", type=float, default=UMBRAL_REGRESION, help="% de empeoramiento tolerado")
+    args = parser.parse_args()
+    solo = getattr(args, "solo", None)
+
+    if args.comando == "comparar":
+        base = cargar(args.base)["resultados"]
+        actual = cargar(args.actual)["resultados"] if args.actual else ejecutar(solo)
+        regresiones = comparar(base, actual, args.umbral)
+        if regresiones:
+            print(f"\n❌ Regresiones sobre {args.umbral:.0f}%: {', '.join(regresiones)}")
+            sys.exit(1)
+        print("\n✅ Sin regresiones.")
+        return
+
+    resultados = ejecutar(solo)
+    if args.comando == "guardar":
+        print(f"\n📄 Baseline guardado: {guardar(args.nombre, resultados)}")
+
+if __name__ == "__main__":
+    main()
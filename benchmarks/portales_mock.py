@@ -0,0 +1,385 @@
+import io
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+from openpyxl import Workbook
+from services.periodo_services import _nombre_mes
+
+# Portales locales que reproducen el DOM que apuntan los selectores de utils/config.py
+# (login, teclado virtual, listado de cuentas, fechas y exportación a Excel).
+BANCOS_MOCK = ("gnb", "basa", "atlas")
+
+RUTAS_LOGIN = {
+    "gnb": "/gnb/login",
+    "basa": "/basa/login",
+    "atlas": "/atlasdigital/login",
+}
+
+_PAGINA = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{titulo}</title></head>
+<body>{cuerpo}</body></html>"""
+
+def _mostrar(id_elemento: str) -> str:
+    return f"document.getElementById('{id_elemento}').style.display='block'"
+
+# ---------------------------------------------------------------- GNB
+
+def _gnb_login() -> str:
+    return f"""
+<button id="logCliente" onclick="{_mostrar('acceso')}">Acceso clientes</button>
+<div id="acceso" style="display:none">
+  <input type="radio" id="rCompany" name="tipo"><label for="rCompany">Empresa</label>
+  <div><input id="ruc"><input id="documentNumber">
+  <button id="bSubmit" type="button" onclick="{_mostrar('paso2')}">Continuar</button></div>
+  <form id="paso2" method="post" action="/gnb/login" style="display:none">
+    <input id="access-username" name="usuario"><input id="access-pin" name="clave" type="password">
+    <button id="btnLogin" type="submit">Ingresar</button>
+  </form>
+</div>"""
+
+def _gnb_menu() -> str:
+    return """
+<a id="rwb_header_user_box_salir" href="/gnb/salir">Salir</a>
+<span class="enlace" onclick="location.href='/gnb/cuentas'">Cuentas y Ahorro</span>"""
+
+def _gnb_cuentas(cuentas: list) -> str:
+    filas = "".join(
+        f"""<tr><td class="first product"><div><em onclick="location.href='/gnb/cuenta/{nro}'">{nro}</em></div>
+        <div>Cuenta corriente</div></td><td>Gs. 1.000.000</td></tr>"""
+        for nro in cuentas
+    )
+    return f'{_gnb_menu()}<table class="cuentas-table">{filas}</table>'
+
+def _gnb_cuenta(nro: str) -> str:
+    return f"""{_gnb_menu()}
+<a id="tabs_OperativasConsultasextractos" onclick="{_mostrar('extractos')}">Extractos</a>
+<div id="extractos" style="display:none">
+  <h3 id="h3QueryDate" onclick="{_mostrar('fechas')}">Consulta por fecha</h3>
+  <div id="fechas" style="display:none">
+    <input id="fechaDesdeStatement"><input id="fechaHastaStatement">
+    <a id="botonDescargaExcel" href="/gnb/excel/{nro}" download
+       onclick="this.href='/gnb/excel/{nro}?desde='+fechaDesdeStatement.value+'&hasta='+fechaHastaStatement.value">Excel</a>
+  </div>
+</div>"""
+
+# ---------------------------------------------------------------- BASA
+
+_JS_TECLADO_BASA = """
+function barajar() {
+  const teclas = Array.from(document.querySelectorAll('[data-valor]'));
+  const textos = teclas.map(t => t.innerText).sort(() => Math.random() - 0.5);
+  teclas.forEach((t, i) => { t.innerText = textos[i]; t.dataset.valor = textos[i]; });
+}
+function presionar(tecla) {
+  document.getElementById('clave').value += tecla.innerText.trim();
+  barajar();
+}
+function enviar() {
+  const teclado = document.getElementById('teclado');
+  if (teclado.style.display === 'none') { teclado.style.display = 'block'; return false; }
+  return true;
+}"""
+
+def _basa_login() -> str:
+    teclas = "".join(
+        f'<span class="tecla" data-valor="{d}" onclick="presionar(this)">{d}</span> '
+        for d in random.sample("0123456789", 10)
+    )
+    return f"""<script>{_JS_TECLADO_BASA}</script>
+<div id="solid-justified-tab1"><form method="post" action="/basa/login" onsubmit="return enviar()">
+  <div><div><div class="col-md-7"><input name="ruc"></div></div></div>
+  <div><div><div class="col-md-7"><input name="usuario"></div></div></div>
+  <div id="teclado" style="display:none">{teclas}</div>
+  <input type="hidden" name="clave" id="clave">
+  <button type="submit" class="btn btn-primary">Ingresar</button>
+</form></div>"""
+
+def _basa_menu() -> str:
+    return f"""
+<div id="navbar-mobile"><ul><li>
+  <a class="dropdown-toggle" onclick="{_mostrar('menu-usuario')}">Usuario</a>
+  <ul id="menu-usuario" style="display:none">
+    <li><a>Perfil</a></li><li><a>Clave</a></li><li><a>Ayuda</a></li><li><a href="/basa/salir">Salir</a></li>
+  </ul>
+</li></ul></div>
+<a href="/basa/productos">Productos</a>"""
+
+def _basa_productos(cuentas: list) -> str:
+    tarjetas = "".join(
+        f"""<div class="content-wrapper"><p>Cuenta Corriente Nro. {nro}</p>
+        <button class="btn btn-default">Ver detalle</button>
+        <button class="btn btn-primary" onclick="location.href='/basa/extracto/{nro}'">Ver extracto</button></div>"""
+        for nro in cuentas
+    )
+    return f'{_basa_menu()}<div class="page-container"><div>{tarjetas}</div></div>'
+
+_JS_SELECT2 = """
+let campo = null;
+function abrir(nombre) {
+  campo = nombre;
+  document.getElementById('select2-dropdown').style.display = 'inline';
+  const buscador = document.getElementById('buscador');
+  buscador.value = '';
+  buscador.focus();
+}
+document.addEventListener('keydown', (e) => {
+  if (e.key !== 'Enter' || !campo) return;
+  document.getElementById('valor-' + campo).innerText = document.getElementById('buscador').value;
+  document.getElementById('select2-dropdown').style.display = 'none';
+  campo = null;
+});
+function descargar(nro) {
+  const valor = (c) => encodeURIComponent(document.getElementById('valor-' + c).innerText);
+  location.href = '/basa/excel/' + nro + '?mes=' + valor('mes') + '&desde=' + valor('inicio') + '&hasta=' + valor('fin');
+}"""
+
+def _basa_selector(campo: str, texto: str) -> str:
+    return f'<span><span class="selection"><span id="valor-{campo}" onclick="abrir(\'{campo}\')">{texto}</span></span></span>'
+
+def _basa_extracto(nro: str) -> str:
+    return f"""<script>{_JS_SELECT2}</script>{_basa_menu()}
+<div id="form-content"><div class="row"><div class="form-group col-md-2">{_basa_selector('mes', 'Mes')}</div></div></div>
+<div id="extracto-pdf">
+  <div>Cuenta {nro}</div><div></div><div></div><label>Desde</label>
+  <div>{_basa_selector('inicio', 'Día')}</div>
+  <label>Hasta</label>
+  <div>{_basa_selector('fin', 'Día')}</div>
+  <div class="col-md-7"><div><div><button>PDF</button></div><div><button onclick="descargar('{nro}')">Excel</button></div></div></div>
+</div>
+<span id="select2-dropdown" style="display:none"><span><span class="select2-search select2-search--dropdown"><input id="buscador"></span></span></span>"""
+
+# ---------------------------------------------------------------- ATLAS
+
+_JS_LOGIN_ATLAS = """
+function elegir(opcion) {
+  document.querySelectorAll('[role=radio]').forEach(r => r.setAttribute('aria-checked', 'false'));
+  opcion.setAttribute('aria-checked', 'true');
+  document.getElementById('empresa').value = opcion.getAttribute('aria-label');
+}
+function enviar() {
+  const empresas = document.getElementById('empresas');
+  if (empresas.style.display === 'none') { empresas.style.display = 'block'; return false; }
+  return document.getElementById('empresa').value !== '';
+}"""
+
+def _atlas_login() -> str:
+    radios = "".join(
+        f'<button type="button" role="radio" aria-checked="false" aria-label="{nombre}" onclick="elegir(this)">{nombre}</button>'
+        for nombre in ("DANIEL BERNARDO MEZA GONZALEZ", "FENIX S.A. DE SEGUROS Y REASEGUROS")
+    )
+    return f"""<script>{_JS_LOGIN_ATLAS}</script>
+<form method="post" action="/atlasdigital/login" onsubmit="return enviar()">
+  <input id="document" name="documento"><input id="password" type="password" name="clave">
+  <div id="empresas" role="radiogroup" style="display:none">{radios}</div>
+  <input type="hidden" name="empresa" id="empresa">
+  <button type="submit">INGRESAR</button>
+</form>"""
+
+def _atlas_menu() -> str:
+    return f"""
+<div class="flex justify-center items-center gap-2"><span class="cursor-pointer" onclick="{_mostrar('confirmar')}">Salir</span></div>
+<div id="confirmar" style="display:none"><button onclick="location.href='/atlasdigital/salir'">Aceptar</button></div>
+<a href="/atlasdigital/account/list">Cuentas</a>"""
+
+def _atlas_lista(cuentas: list) -> str:
+    tarjetas = "".join(
+        f"""<div class="_secctionCardClassic_t5kfd_79"><p>Cuenta corriente {nro}</p>
+        <div class="_showMovementsText_t5kfd_146" onclick="location.href='/atlasdigital/account/{nro}'">Ver movimientos</div></div>"""
+        for nro in cuentas
+    )
+    return f"{_atlas_menu()}<section>{tarjetas}</section>"
+
+def _atlas_cuenta(nro: str) -> str:
+    mes = datetime.today().replace(day=1)
+    opciones = []
+    for _ in range(12):
+        mes = (mes - timedelta(days=1)).replace(day=1)
+        nombre = _nombre_mes(mes)
+        opciones.append(
+            f"""<div role="option" onclick="document.getElementById('mes').innerText='{nombre}';
+            document.getElementById('opciones').style.display='none'">{nombre}</div>"""
+        )
+    return f"""{_atlas_menu()}
+<button role="combobox" class="text-principal" id="mes" onclick="{_mostrar('opciones')}">Seleccionar mes</button>
+<div id="opciones" style="display:none">{''.join(opciones)}</div>
+<button class="bg-principal border-2 text-primary-foreground px-4 py-2 w-full md:w-28 text-xs h-7" onclick="{_mostrar('exportar')}">Buscar</button>
+<div id="exportar" style="display:none">
+  <button onclick="location.href='/atlasdigital/excel/{nro}?mes='+encodeURIComponent(document.getElementById('mes').innerText)">
+    <img src="/static/xls_icon.png" alt="xls"></button>
+</div>
+<button class="bg-principal text-white w-36" onclick="location.href='/atlasdigital/account/list'">VOLVER</button>"""
+
+# ---------------------------------------------------------------- Servidor
+
+def moneda_cuenta(nro_cuenta: str) -> str:
+    # Una de cada tres cuentas en USD, para que los extractos mezclen montos con y sin centavos
+    return "USD" if int(nro_cuenta) % 3 == 0 else "GS"
+
+def generar_extracto(nro_cuenta: str, movimientos: int, moneda: str = "GS") -> bytes:
+    libro = Workbook()
+    hoja = libro.active
+    hoja.append(["Extracto de cuenta (portal de prueba)"])
+    hoja.append([f"Cuenta: {nro_cuenta}"])
+    hoja.append([])
+    hoja.append(["FECHA", "DESCRIPCION", "DEBITO", "CREDITO", "SALDO"])
+    usd = moneda.upper() == "USD"
+    saldo = 25_000.0 if usd else 1_000_000
+    azar = random.Random(nro_cuenta)
+    inicio = datetime.today().replace(day=1) - timedelta(days=30)
+    for indice in range(movimientos):
+        monto = round(azar.uniform(1, 2_000), 2) if usd else azar.randint(1_000, 500_000)
+        debito, credito = (monto, 0) if azar.random() < 0.5 else (0, monto)
+        saldo = round(saldo + credito - debito, 2) if usd else saldo + credito - debito
+        fecha = inicio + timedelta(days=indice % 28)
+        hoja.append([fecha.strftime("%d/%m/%Y"), f"Movimiento {indice + 1}", debito, credito, saldo])
+    buffer = io.BytesIO()
+    libro.save(buffer)
+    return buffer.getvalue()
+
+class PortalesMock:
+    """
+    Servidor HTTP local con un portal por banco. `latencia_ms` se aplica a cada
+    request y `cuentas` define el listado que muestra cada portal.
+    """
+
+    def __init__(self, cuentas: dict, latencia_ms: float = 0, movimientos: int = 60,
+                 host: str = "127.0.0.1", puerto: int = 0):
+        self.cuentas = {banco.lower(): [str(nro) for nro in nros] for banco, nros in cuentas.items()}
+        self.latencia_ms = latencia_ms
+        self.movimientos = movimientos
+        self.host = host
+        self.puerto = puerto
+        self.servidor = None
+        self.hilo = None
+        self.descargas = 0
+        self._extractos = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url_base(self) -> str:
+        host, puerto = self.servidor.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def url_login(self, banco: str) -> str:
+        return f"{self.url_base}{RUTAS_LOGIN[banco.lower()]}"
+
+    def iniciar(self) -> "PortalesMock":
+        portales = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                portales._atender(self, "GET")
+
+            def do_POST(self):
+                portales._atender(self, "POST")
+
+        self.servidor = ThreadingHTTPServer((self.host, self.puerto), Manejador)
+        self.servidor.daemon_threads = True
+        self.hilo = threading.Thread(target=self.servidor.serve_forever, name="portales-mock", daemon=True)
+        self.hilo.start()
+        return self
+
+    def cerrar(self):
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+
+    def _extracto(self, nro: str) -> bytes:
+        with self._lock:
+            if nro not in self._extractos:
+                self._extractos[nro] = generar_extracto(nro, self.movimientos, moneda_cuenta(nro))
+            self.descargas += 1
+            return self._extractos[nro]
+
+    def _atender(self, handler, metodo: str):
+        if self.latencia_ms:
+            time.sleep(self.latencia_ms / 1000)
+
+        url = urlparse(handler.path)
+        partes = [parte for parte in url.path.split("/") if parte]
+        banco = "atlas" if partes[:1] == ["atlasdigital"] else (partes[0] if partes else "")
+        if banco not in BANCOS_MOCK:
+            return self._responder(handler, 404, "No encontrado")
+
+        cookie = f"sesion_{banco}=1"
+        autenticado = cookie in (handler.headers.get("Cookie") or "")
+        recurso = partes[1:]
+        if banco == "atlas" and recurso[:1] == ["account"]:
+            # /atlasdigital/account/list y /atlasdigital/account/<nro>, como el portal real
+            recurso = ["cuentas"] if recurso[1:] == ["list"] else ["cuenta", *recurso[1:]]
+        inicio = "/atlasdigital/home" if banco == "atlas" else f"/{banco}/home"
+        login = RUTAS_LOGIN[banco]
+
+        if recurso[:1] == ["login"]:
+            if metodo == "POST":
+                handler.rfile.read(int(handler.headers.get("Content-Length") or 0))
+                return self._redirigir(handler, inicio, f"{cookie}; Path=/")
+            if autenticado:
+                return self._redirigir(handler, inicio)
+            return self._pagina(handler, banco, {"gnb": _gnb_login, "basa": _basa_login, "atlas": _atlas_login}[banco]())
+
+        if not autenticado:
+            return self._redirigir(handler, login)
+
+        if recurso[:1] == ["salir"]:
+            return self._redirigir(handler, login, f"sesion_{banco}=; Path=/; Max-Age=0")
+
+        if recurso[:1] == ["excel"] and len(recurso) == 2:
+            datos = self._extracto(recurso[1])
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            handler.send_header("Content-Disposition", f'attachment; filename="extracto_{recurso[1]}.xlsx"')
+            handler.send_header("Content-Length", str(len(datos)))
+            handler.end_headers()
+            handler.wfile.write(datos)
+            return
+
+        cuentas = self.cuentas.get(banco, [])
+        if recurso[:1] == ["home"]:
+            menu = {"gnb": _gnb_menu, "basa": _basa_menu, "atlas": _atlas_menu}[banco]()
+            return self._pagina(handler, banco, menu)
+        if recurso[:1] in (["cuentas"], ["productos"]):
+            listado = {"gnb": _gnb_cuentas, "basa": _basa_productos, "atlas": _atlas_lista}[banco]
+            return self._pagina(handler, banco, listado(cuentas))
+        if recurso[:1] in (["cuenta"], ["extracto"]) and len(recurso) == 2 and recurso[1] in cuentas:
+            detalle = {"gnb": _gnb_cuenta, "basa": _basa_extracto, "atlas": _atlas_cuenta}[banco]
+            return self._pagina(handler, banco, detalle(recurso[1]))
+        return self._responder(handler, 404, "No encontrado")
+
+    def _pagina(self, handler, banco: str, cuerpo: str):
+        self._responder(handler, 200, _PAGINA.format(titulo=f"{banco.upper()} (mock)", cuerpo=cuerpo))
+
+    @staticmethod
+    def _responder(handler, codigo: int, html: str):
+        datos = html.encode("utf-8")
+        handler.send_response(codigo)
+        handler.send_header("Content-Type", "text/html; charset=utf-8")
+        handler.send_header("Content-Length", str(len(datos)))
+        handler.end_headers()
+        handler.wfile.write(datos)
+
+    @staticmethod
+    def _redirigir(handler, destino: str, cookie: str = None):
+        handler.send_response(303)
+        handler.send_header("Location", destino)
+        if cookie:
+            handler.send_header("Set-Cookie", cookie)
+        handler.send_header("Content-Length", "0")
+        handler.end_headers()
+
+if __name__ == "__main__":
+    # Uso: python -m benchmarks.portales_mock  (sirve los portales hasta Ctrl+C)
+    portales = PortalesMock({banco: [10000001 + i for i in range(5)] for banco in BANCOS_MOCK}, puerto=8900).iniciar()
+    for banco in BANCOS_MOCK:
+        print(f"{banco.upper()}: {portales.url_login(banco)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        portales.cerrar()
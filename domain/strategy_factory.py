@@ -1,29 +1,31 @@
 # application/actions/strategy_factory.py
 
-from application.actions.basa_actions import BasaActions
-from application.actions.sudameris_actions import SudamerisActions
-from application.actions.continental_actions import ContinentalActions
-from application.actions.atlas_actions import AtlasActions
-from application.actions.gnb_actions import GnbActions
-from application.actions.itau_actions import ItauActions
+import importlib
 
-def get_strategy(nombre_banco, credentials, selectors, flow, contexto):
+# Registro perezoso: cada estrategia se importa la primera vez que se usa su banco
+ESTRATEGIAS = {
+    "basa": ("application.actions.basa_actions", "BasaActions"),
+    "sudameris": ("application.actions.sudameris_actions", "SudamerisActions"),
+    "continental": ("application.actions.continental_actions", "ContinentalActions"),
+    "atlas": ("application.actions.atlas_actions", "AtlasActions"),
+    "gnb": ("application.actions.gnb_actions", "GnbActions"),
+    "itau": ("application.actions.itau_actions", "ItauActions"),
+}
+
+_clases = {}
+
+def get_strategy_class(nombre_banco):
     banco = nombre_banco.lower()
+    clase = _clases.get(banco)
+    if clase is None:
+        if banco not in ESTRATEGIAS:
+            raise ValueError(f"❌ No hay estrategia definida para el banco: {nombre_banco}")
+        modulo, nombre_clase = ESTRATEGIAS[banco]
+        clase = _clases[banco] = getattr(importlib.import_module(modulo), nombre_clase)
+    return clase
 
-    if banco == "basa":
-        return BasaActions(credentials, selectors, flow, contexto)
-    elif banco == "sudameris":
-        return SudamerisActions(credentials, selectors, flow, contexto)
-    elif banco == "continental":
-        return ContinentalActions(credentials, selectors, flow, contexto)
-    elif banco == "atlas":
-        return AtlasActions(credentials, selectors, flow, contexto)
-    elif banco == "gnb":
-        return GnbActions(credentials, selectors, flow, contexto)
-    elif banco == "itau":
-        return ItauActions(credentials, selectors, flow, contexto)
-    else:
-        raise ValueError(f"❌ No hay estrategia definida para el banco: {nombre_banco}")
+def get_strategy(nombre_banco, credentials, selectors, flow, contexto):
+    return get_strategy_class(nombre_banco)(credentials, selectors, flow, contexto)
 
 def get_bank_executor(nombre_banco, credentials, selectors, flow, contexto):
     return get_strategy(nombre_banco, credentials, selectors, flow, contexto)
@@ -1,34 +1,54 @@
+import logging
 import os
 import shutil
 from playwright.async_api import async_playwright
+from services.sesion_service import (
+    COOKIE_DIR,
+    ruta_sesion,
+    sesion_vigente,
+    registrar_sesion,
+    invalidar_sesion
+)
 
 class BrowserManager:
 
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, pool=None):
+        self.logger = logging.getLogger(__name__)
         self.headless = headless
+        self.pool = pool
         self.browser = None
         self.context = None
         self.playwright = None
+        self.cookies_cargadas = False
+
+    async def _new_context(self, **opciones):
+        # Con pool se presta un contexto de un navegador ya lanzado
+        if self.pool:
+            return await self.pool.obtener_contexto(**opciones)
 
-    async def create_browser_context(self, banco=None):
         self.playwright = await async_playwright().start()
         self.browser = await self.playwright.chromium.launch(headless=self.headless)
+        return await self.browser.new_context(**opciones)
+
+    async def create_browser_context(self, banco=None, ttl_sesion=None):
+        os.makedirs(COOKIE_DIR, exist_ok=True)
 
-        self.cookie_dir = os.path.join("storage", "cookies")
-        os.makedirs(self.cookie_dir, exist_ok=True)
+        usar_cookies = bool(banco) and sesion_vigente(banco, ttl_sesion)
+        if banco and not usar_cookies and os.path.exists(ruta_sesion(banco)):
+            self.logger.info(f"⌛ Sesión almacenada vencida para {banco}, se descarta.")
+            invalidar_sesion(banco)
 
-        storage_path = f"{self.cookie_dir}/{banco.lower()}.json" if banco else None
-        usar_cookies = banco and os.path.exists(storage_path)
+        self.cookies_cargadas = usar_cookies
 
         if usar_cookies:
-            print(f"🧠 Cargando cookies para {banco}")
-            self.context = await self.browser.new_context(
-                storage_state=storage_path,
+            self.logger.info(f"🧠 Cargando cookies para {banco}")
+            self.context = await self._new_context(
+                storage_state=ruta_sesion(banco),
                 accept_downloads=True
             )
         else:
-            print(f"🆕 Contexto limpio para {banco or 'sesión anónima'}")
-            self.context = await self.browser.new_context(
+            self.logger.info(f"🆕 Contexto limpio para {banco or 'sesión anónima'}")
+            self.context = await self._new_context(
                 accept_downloads=True
             )
 
@@ -37,12 +57,18 @@ class BrowserManager:
     async def save_context_storage(self, banco=None):
 
         if banco:
-            ruta_dir = os.path.join("storage", "cookies")
-            os.makedirs(ruta_dir, exist_ok=True)
+            os.makedirs(COOKIE_DIR, exist_ok=True)
+            await self.context.storage_state(path=ruta_sesion(banco))
+            registrar_sesion(banco)
+            self.logger.info(f"💾 Cookies guardadas para banco: {banco}")
+
+    async def discard_context_storage(self, banco=None):
 
-            storage_path = os.path.join(self.cookie_dir, f"{banco.lower()}.json")
-            await self.context.storage_state(path=storage_path)
-            print(f"💾 Cookies guardadas para banco: {banco}")
+        if banco:
+            invalidar_sesion(banco)
+            if self.context:
+                await self.context.clear_cookies()
+            self.logger.info(f"🗑️ Sesión descartada para banco: {banco}")
             
     async def get_new_page(self):
 
@@ -52,24 +78,30 @@ class BrowserManager:
     async def close_browser(self):
 
         try:
+            if self.pool:
+                if self.context:
+                    await self.pool.liberar_contexto(self.context)
+                    self.logger.info("✔ Contexto devuelto al pool.")
+                return
+
             if self.context:
                 await self.context.close()
-                print("✔ Contexto cerrado correctamente.")
+                self.logger.info("✔ Contexto cerrado correctamente.")
 
             if self.browser:
                 await self.browser.close()
-                print("✔ Navegador cerrado correctamente.")
+                self.logger.info("✔ Navegador cerrado correctamente.")
 
             if self.playwright:
                 await self.playwright.stop()
-                print("✔ Playwright detenido correctamente.")
+                self.logger.info("✔ Playwright detenido correctamente.")
 
         except Exception as e:
-            print(f"⚠️ Error al cerrar navegador/contexto: {e}")
+            self.logger.warning(f"⚠️ Error al cerrar navegador/contexto: {e}")
 
     async def clear_temp_files(self):
 
         temp_folder = "user_data"
         if os.path.exists(temp_folder):
             shutil.rmtree(temp_folder, ignore_errors=True)
-            print("🧹 Carpeta temporal eliminada.")
+            self.logger.info("🧹 Carpeta temporal eliminada.")
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from playwright.async_api import async_playwright
+
+class _NavegadorPool:
+    def __init__(self, browser):
+        self.browser = browser
+        self.contextos = set()
+        self.usos = 0
+
+    @property
+    def saludable(self):
+        return self.browser.is_connected()
+
+class BrowserPool:
+    """
+    Mantiene uno o pocos procesos de Chromium vivos y presta un BrowserContext
+    aislado por banco/trabajo. Los navegadores caídos se reemplazan y los que
+    superan `reciclar_despues_de` contextos se relanzan cuando quedan libres.
+    """
+
+    def __init__(self, headless: bool = False, max_navegadores: int = 1, reciclar_despues_de: int = 20):
+        self.logger = logging.getLogger(__name__)
+        self.headless = headless
+        self.max_navegadores = max(1, max_navegadores)
+        self.reciclar_despues_de = max(1, reciclar_despues_de)
+        self.playwright = None
+        self.navegadores = []
+        self.prestamos = {}
+        self._lock = asyncio.Lock()
+
+    async def iniciar(self):
+        if not self.playwright:
+            self.playwright = await async_playwright().start()
+            self.logger.info("🚀 Pool de navegadores iniciado.")
+        return self
+
+    async def _lanzar(self):
+        browser = await self.playwright.chromium.launch(headless=self.headless)
+        navegador = _NavegadorPool(browser)
+        self.navegadores.append(navegador)
+        self.logger.info(f"🧩 Navegador lanzado en pool ({len(self.navegadores)}/{self.max_navegadores}).")
+        return navegador
+
+    async def _descartar(self, navegador, motivo: str):
+        self.navegadores.remove(navegador)
+        try:
+            await navegador.browser.close()
+        except Exception as e:
+            self.logger.debug(f"Error cerrando navegador descartado: {e}")
+        self.logger.info(f"♻️ Navegador descartado del pool: {motivo}")
+
+    async def _elegir_navegador(self):
+        # Health check y reciclaje de los navegadores sin contextos activos
+        for navegador in list(self.navegadores):
+            if not navegador.saludable:
+                await self._descartar(navegador, "desconectado")
+            elif not navegador.contextos and navegador.usos >= self.reciclar_despues_de:
+                await self._descartar(navegador, f"{navegador.usos} contextos servidos")
+
+        if len(self.navegadores) < self.max_navegadores:
+            libres = [n for n in self.navegadores if not n.contextos]
+            if not libres:
+                return await self._lanzar()
+
+        return min(self.navegadores, key=lambda n: len(n.contextos))
+
+    async def obtener_contexto(self, **opciones):
+        await self.iniciar()
+        async with self._lock:
+            navegador = await self._elegir_navegador()
+            context = await navegador.browser.new_context(**opciones)
+            navegador.contextos.add(context)
+            navegador.usos += 1
+            self.prestamos[context] = navegador
+        return context
+
+    async def liberar_contexto(self, context):
+        navegador = self.prestamos.pop(context, None)
+        try:
+            await context.close()
+        except Exception as e:
+            self.logger.warning(f"⚠️ Error al cerrar contexto prestado: {e}")
+        if navegador:
+            navegador.contextos.discard(context)
+
+    async def cerrar(self):
+        async with self._lock:
+            for context in list(self.prestamos):
+                await self.liberar_contexto(context)
+            for navegador in list(self.navegadores):
+                await self._descartar(navegador, "cierre del pool")
+            if self.playwright:
+                await self.playwright.stop()
+                self.playwright = None
+                self.logger.info("✔ Pool de navegadores detenido.")
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+
+TRAZAS_DIR = os.path.join("storage", "traces")
+
+# Grabador del contexto de navegador en curso; None cuando el tracing está apagado
+grabador_trazas_actual = ContextVar("grabador_trazas_actual", default=None)
+
+class GrabadorTrazas:
+    """
+    Tracing de Playwright por chunks: un chunk por paso, de los que solo se
+    conservan los últimos `max_pasos` en un directorio temporal. Se copian a
+    storage/traces/ únicamente cuando un paso falla o supera `umbral_ms`.
+    """
+
+    def __init__(self, context, banco: str, max_pasos: int = 10, umbral_ms: float = None):
+        self.logger = logging.getLogger(__name__)
+        self.context = context
+        self.banco = banco.lower()
+        self.max_pasos = max(1, max_pasos)
+        self.umbral_ms = umbral_ms
+        self.buffer = deque()
+        self.contador = 0
+        self.temporal = None
+        self.activo = False
+
+    async def iniciar(self):
+        try:
+            self.temporal = await asyncio.to_thread(tempfile.mkdtemp, prefix="fenix_trazas_")
+            await self.context.tracing.start(screenshots=True, snapshots=True)
+            self.activo = True
+            self.logger.info(f"🎞️ Tracing en anillo activo: últimos {self.max_pasos} pasos.")
+        except Exception as e:
+            self.logger.warning(f"⚠️ No se pudo iniciar el tracing: {e}")
+        return self
+
+    async def antes_de_paso(self, descripcion: str):
+        if not self.activo:
+            return
+        try:
+            await self.context.tracing.start_chunk(title=descripcion)
+        except Exception as e:
+            self.logger.debug(f"Error iniciando chunk de traza: {e}")
+
+    async def despues_de_paso(self, descripcion: str, duracion_ms: float, error: Exception = None):
+        if not self.activo:
+            return
+        try:
+            self.contador += 1
+            ruta_chunk = os.path.join(self.temporal, f"{self.contador:06d}.zip")
+            await self.context.tracing.stop_chunk(path=ruta_chunk)
+            self.buffer.append((descripcion, duracion_ms, ruta_chunk))
+            while len(self.buffer) > self.max_pasos:
+                _, _, descartado = self.buffer.popleft()
+                await asyncio.to_thread(_eliminar, descartado)
+
+            if error is not None:
+                await self._persistir(f"error: {error}")
+            elif self.umbral_ms and duracion_ms > self.umbral_ms:
+                await self._persistir(f"lento: {duracion_ms:.0f}ms > {self.umbral_ms:.0f}ms")
+        except Exception as e:
+            self.logger.debug(f"Error guardando chunk de traza: {e}")
+
+    async def _persistir(self, motivo: str):
+        destino = os.path.join(TRAZAS_DIR, f"{self.banco}_{datetime.now():%Y%m%d_%H%M%S}_{self.contador:06d}")
+        pasos = list(self.buffer)
+        await asyncio.to_thread(_copiar_chunks, destino, pasos, motivo)
+        self.logger.warning(f"🎞️ Trazas de los últimos {len(pasos)} pasos guardadas en {destino} ({motivo})")
+
+    async def cerrar(self):
+        if self.activo:
+            try:
+                await self.context.tracing.stop()
+            except Exception as e:
+                self.logger.debug(f"Error deteniendo tracing: {e}")
+            self.activo = False
+        if self.temporal:
+            await asyncio.to_thread(shutil.rmtree, self.temporal, True)
+
+def _eliminar(ruta: str):
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+def _copiar_chunks(destino: str, pasos: list, motivo: str):
+    os.makedirs(destino, exist_ok=True)
+    indice = []
+    for orden, (descripcion, duracion_ms, ruta_chunk) in enumerate(pasos, start=1):
+        nombre = f"{orden:02d}_{os.path.basename(ruta_chunk)}"
+        if os.path.exists(ruta_chunk):
+            shutil.copy2(ruta_chunk, os.path.join(destino, nombre))
+        indice.append({"orden": orden, "paso": descripcion, "duracion_ms": round(duracion_ms, 1), "archivo": nombre})
+    with open(os.path.join(destino, "indice.json"), "w", encoding="utf-8") as file:
+        json.dump({"motivo": motivo, "pasos": indice}, file, ensure_ascii=False, indent=2)
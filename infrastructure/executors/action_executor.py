@@ -1,8 +1,25 @@
+import asyncio
 import logging
 import re
 import os
+import time
 from datetime import datetime
 from services.ruta_service import generar_clave_cuenta
+from infrastructure.executors.dom_extractor import extraer_contenedores
+from infrastructure.executors.reintentos import ejecutar_con_reintentos
+from infrastructure.metrics.metricas import metricas_actuales
+from infrastructure.metrics.latencias import latencias_actuales
+from infrastructure.browser.trazas import grabador_trazas_actual
+from infrastructure.logger.logging_config import paso_log
+from infrastructure.executors.flow_compiler import (
+    PasoCompilado,
+    compilar_paso,
+    compilar_flujo,
+    resolver_selector
+)
+
+# Timeout por defecto de las esperas por eventos (wait_network_idle, wait_stable, ...)
+TIMEOUT_ESPERA_MS = 15000
 
 class ActionExecutor:
     def __init__(self, page, selectors: dict, credentials: dict):
@@ -13,6 +30,10 @@ class ActionExecutor:
         self.contexto = {}
         self.cuentas_indexadas = set()
         self.ruta_salida = ""
+        self._handlers = self._acciones()
+        self.recargas_evitadas = 0
+        # Fallo que un handler registró sin propagarlo (click, fill, buscar, dropdown)
+        self.error_paso = None
 
     def resolve_variable(self, value):
         if isinstance(value, str) and value.startswith("$"):
@@ -22,13 +43,7 @@ class ActionExecutor:
         return value
 
     def get_selector(self, path):
-        if not path:
-            return None
-        keys = path.split(".")
-        selector = self.selectors
-        for key in keys:
-            selector = selector.get(key, {})
-        return selector if isinstance(selector, str) else None
+        return resolver_selector(self.selectors, path)
 
     def set_contexto(self, **kwargs):
         self.contexto = kwargs
@@ -51,19 +66,96 @@ class ActionExecutor:
             self.logger.error(f"❌ Error al verificar modal de contraseña: {e}")
             raise
 
+    async def verificar_sesion(self, config_sesion: dict) -> bool:
+        selector = self.get_selector(config_sesion.get("probe"))
+        if not selector:
+            self.logger.warning("⚠️ La configuración de sesión no tiene un 'probe' válido.")
+            return False
+
+        url = self.resolve_variable(config_sesion.get("url", "$url"))
+        timeout = int(config_sesion.get("timeout", 5000))
+        try:
+            if url:
+                await self.page.goto(url, timeout=60000, wait_until="domcontentloaded")
+            await self.page.wait_for_selector(selector, state="visible", timeout=timeout)
+            self.logger.info(f"🔓 Sesión activa detectada con {selector}")
+            return True
+        except Exception as e:
+            self.logger.info(f"🔒 Sesión no válida ({selector}): {e}")
+            return False
+
+    async def esperar_condicion(self, action: str, step: dict, selector: str, value):
+        timeout = int(step.get("timeout", TIMEOUT_ESPERA_MS))
+        inicio = time.perf_counter()
+        try:
+            if action == "wait_network_idle":
+                await self.page.wait_for_load_state("networkidle", timeout=timeout)
+
+            elif action == "wait_response":
+                patron = value or ""
+                estado = step.get("status")
+
+                def coincide(response):
+                    return patron in response.url and (estado is None or response.status == int(estado))
+
+                if selector:
+                    # Con target se arma la espera antes del click para no perder la respuesta
+                    async with self.page.expect_response(coincide, timeout=timeout):
+                        await self.page.click(selector)
+                else:
+                    await self.page.wait_for_response(coincide, timeout=timeout)
+
+            elif action == "wait_stable":
+                elemento = await self.page.wait_for_selector(selector, state="visible", timeout=timeout)
+                # El timeout cubre ambas esperas: el peor caso no supera la pausa que reemplaza
+                restante = max(1, timeout - (time.perf_counter() - inicio) * 1000)
+                await elemento.wait_for_element_state("stable", timeout=restante)
+
+            elif action == "wait_detached":
+                await self.page.wait_for_selector(selector, state=step.get("state", "detached"), timeout=timeout)
+
+            elif action == "wait_download":
+                if value:
+                    await self.esperar_y_guardar_descarga(selector, value)
+                else:
+                    async with self.page.expect_download(timeout=timeout) as download_info:
+                        await self.page.click(selector)
+                    await download_info.value
+
+            self.logger.info(f"⏱️ {action} {selector or value or ''} listo en {(time.perf_counter() - inicio) * 1000:.0f}ms")
+
+        except Exception as e:
+            # Por defecto una espera vencida no corta el flujo, igual que un wait_time
+            if step.get("required"):
+                raise
+            self.logger.warning(f"⚠️ {action} {selector or value or ''} no se cumplió en {timeout}ms: {e}")
+
+    @staticmethod
+    def _eliminar_si_existe(ruta: str):
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
     async def esperar_y_guardar_descarga(self, selector: str, ruta_destino: str):
         if not ruta_destino or not ruta_destino.strip():
             raise ValueError("❌ La ruta de descarga está vacía o no fue resuelta correctamente.")
-        os.makedirs(os.path.dirname(ruta_destino), exist_ok=True)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(ruta_destino), exist_ok=True)
         async with self.page.expect_download() as download_info:
             await self.page.click(selector)
         download = await download_info.value
+        # Se guarda en un temporal de la misma carpeta y se renombra de forma atómica
+        ruta_temporal = f"{ruta_destino}.part"
         try:
-            await download.save_as(ruta_destino)
+            await download.save_as(ruta_temporal)
+            await asyncio.to_thread(os.replace, ruta_temporal, ruta_destino)
             self.logger.info(f"✅ Archivo guardado como: {ruta_destino}")
         except Exception as e:
             self.logger.error(f"❌ Error al guardar archivo: {e}")
+            await asyncio.to_thread(self._eliminar_si_existe, ruta_temporal)
             raise
+
+        pipeline = self.contexto.get("post_descarga")
+        if pipeline:
+            await pipeline.encolar(ruta_destino)
         
     async def descargar_reportes(self, pasos_descarga: list, banco: str):
         banco = banco.lower().strip()
@@ -104,7 +196,7 @@ class ActionExecutor:
         processed_cuentas = set()
 
         while True:
-            contenedores = await self.page.query_selector_all(list_selector)
+            contenedores = await extraer_contenedores(self.page, list_selector)
             if not contenedores:
                 self.logger.warning("⚠️ No se encontraron contenedores de cuentas en el DOM.")
                 break
@@ -112,14 +204,8 @@ class ActionExecutor:
             avanzar = False
 
             for contenedor in contenedores:
-                try:
-                    texto_contenedor = (await contenedor.inner_text()).replace("\xa0", " ").upper()
-                    posibles = re.findall(r"\d{6,}", texto_contenedor)
-                    if not posibles:
-                        continue
-                    nro_cuenta = int(posibles[0])
-                except Exception as e:
-                    self.logger.debug(f"❌ Error extrayendo cuenta: {e}")
+                nro_cuenta = contenedor.nro_cuenta
+                if nro_cuenta is None:
                     continue
 
                 if nro_cuenta in processed_cuentas:
@@ -138,9 +224,10 @@ class ActionExecutor:
                     continue
 
                 self.contexto["ruta_descarga"] = ruta[0] if isinstance(ruta, tuple) else ruta
+                self.contexto["clave_cuenta"] = clave
 
                 try:
-                    await contenedor.click()
+                    await self.page.locator(list_selector).nth(contenedor.indice).click()
                 except Exception as e:
                     continue
 
@@ -197,6 +284,7 @@ class ActionExecutor:
                 clave = generar_clave_cuenta(cuenta)
                 self.ruta_salida = self.contexto.get("rutas_por_cuenta", {}).get(clave, self.contexto.get("base_dir"))
                 self.contexto["ruta_descarga"] = self.ruta_salida
+                self.contexto["clave_cuenta"] = clave
                 self.logger.info(f"📁 Ruta descarga: {self.ruta_salida}")
 
                 # 👉 Ejecutar pasos
@@ -214,7 +302,7 @@ class ActionExecutor:
             self.logger.error("❌ Faltan selectores necesarios.")
             return
 
-        contenedores = await self.page.query_selector_all(list_selector)
+        contenedores = await extraer_contenedores(self.page, list_selector, button_selector, button_text)
         if not contenedores:
             self.logger.warning("⚠️ No se encontraron contenedores.")
             return
@@ -226,11 +314,9 @@ class ActionExecutor:
 
         for contenedor in contenedores:
             try:
-                texto = (await contenedor.inner_text()).replace("\xa0", " ").upper()
-                posibles = re.findall(r"\d{6,}", texto)
-                if not posibles:
+                nro_cuenta = contenedor.nro_cuenta
+                if nro_cuenta is None:
                     continue
-                nro_cuenta = int(posibles[0])
                 cuenta = cuentas_excel.get(nro_cuenta)
                 if not cuenta:
                     continue
@@ -243,17 +329,26 @@ class ActionExecutor:
 
                 self.ruta_salida = ruta[0] if isinstance(ruta, tuple) else ruta
                 self.contexto["ruta_descarga"] = self.ruta_salida
+                self.contexto["clave_cuenta"] = clave
+
+                if contenedor.indice_boton is None:
+                    continue
 
-                botones = await contenedor.query_selector_all(button_selector)
-                for boton in botones:
-                    texto_boton = (await boton.inner_text()).strip().lower()
-                    if button_text in texto_boton:
-                        await boton.click()
-                        await self.run_flow(pasos_descarga)
-                        break
+                # Se re-resuelve por índice: los handles quedan obsoletos al volver al listado
+                boton = self.page.locator(list_selector).nth(contenedor.indice).locator(button_selector).nth(contenedor.indice_boton)
+                await boton.click()
+                await self.run_flow(pasos_descarga)
             except Exception as e:
                 self.logger.error(f"❌ Error procesando contenedor: {e}")
 
+    async def _localizar_contenedor_atlas(self, list_selector: str, nro_cuenta: int, timeout: int = 5000):
+        contenedor = self.page.locator(list_selector).filter(has_text=str(nro_cuenta)).first
+        try:
+            await contenedor.wait_for(state="visible", timeout=timeout)
+            return contenedor
+        except Exception:
+            return None
+
     async def descargar_reportes_atlas(self, pasos_descarga: list):
         list_selector = self.selectors["step_2"].get("list_selector")
         button_selector = self.selectors["step_2"].get("action_button_selector")
@@ -268,88 +363,94 @@ class ActionExecutor:
             for c in self.contexto.get("cuentas", []) if str(c.get("NROCUENTA", "")).strip().isdigit()
         }
 
-        while True:
-            contenedores = await self.page.query_selector_all(list_selector)
-            if not contenedores:
-                self.logger.warning("⚠️ No se encontraron contenedores de cuentas.")
-                return
+        contenedores = await extraer_contenedores(self.page, list_selector)
+        if not contenedores:
+            self.logger.warning("⚠️ No se encontraron contenedores de cuentas.")
+            return
 
-            cuentas_en_ui = []
-            for contenedor in contenedores:
-                try:
-                    texto_contenedor = (await contenedor.inner_text()).replace("\xa0", " ").upper()
-                    posibles = re.findall(r"\d{6,}", texto_contenedor)
-                    if not posibles:
-                        continue
-                    nro_cuenta = int(posibles[0])
-                    cuentas_en_ui.append((nro_cuenta, contenedor))
-                except:
-                    continue
+        # La URL del listado se toma de la página actual en vez de fijarla en código
+        url_lista = self.page.url
 
-            if not cuentas_en_ui:
-                self.logger.warning("⚠️ No se detectaron cuentas en el DOM.")
-                return
+        cuentas_en_ui = [c.nro_cuenta for c in contenedores if c.nro_cuenta is not None]
 
-            for nro_cuenta, _ in cuentas_en_ui:
-                # Recarga la vista para evitar referencias inválidas
-                await self.page.goto("https://secure.atlas.com.py/atlasdigital/account/list")
-                await self.page.wait_for_selector(list_selector)
-                await self.page.wait_for_timeout(1000)
+        if not cuentas_en_ui:
+            self.logger.warning("⚠️ No se detectaron cuentas en el DOM.")
+            return
 
-                contenedores_actualizados = await self.page.query_selector_all(list_selector)
+        patron_boton = re.compile(re.escape(button_text), re.IGNORECASE)
+        recargas = 0
+        self.recargas_evitadas = 0
 
-                contenedor_objetivo = None
-                for contenedor in contenedores_actualizados:
-                    texto_contenedor = (await contenedor.inner_text()).replace("\xa0", " ").upper()
-                    if str(nro_cuenta) in texto_contenedor:
-                        contenedor_objetivo = contenedor
-                        break
+        for nro_cuenta in cuentas_en_ui:
+            cuenta = cuentas_excel.get(nro_cuenta)
+            if not cuenta:
+                self.logger.info(f"🔸 Cuenta {nro_cuenta} no encontrada en Excel.")
+                continue
 
-                if not contenedor_objetivo:
-                    self.logger.warning(f"❌ Contenedor no encontrado para cuenta {nro_cuenta}")
-                    continue
+            clave = generar_clave_cuenta(cuenta)
+            ruta = self.contexto.get("rutas_por_cuenta", {}).get(clave)
+            if not ruta:
+                self.logger.warning(f"🚫 No se encontró ruta para {clave}")
+                continue
+
+            # El listado sigue en pantalla tras el "VOLVER" del flow: solo se recarga si quedó obsoleto
+            contenedor_objetivo = await self._localizar_contenedor_atlas(list_selector, nro_cuenta)
+            if contenedor_objetivo:
+                self.recargas_evitadas += 1
+            else:
+                self.logger.info(f"🔄 Listado obsoleto, recargando para cuenta {nro_cuenta}")
+                await self.page.goto(url_lista)
+                await self.page.wait_for_selector(list_selector)
+                recargas += 1
+                contenedor_objetivo = await self._localizar_contenedor_atlas(list_selector, nro_cuenta)
 
-                cuenta = cuentas_excel.get(nro_cuenta)
-                if not cuenta:
-                    self.logger.info(f"🔸 Cuenta {nro_cuenta} no encontrada en Excel.")
-                    continue
+            if not contenedor_objetivo:
+                self.logger.warning(f"❌ Contenedor no encontrado para cuenta {nro_cuenta}")
+                continue
 
-                clave = generar_clave_cuenta(cuenta)
-                ruta = self.contexto.get("rutas_por_cuenta", {}).get(clave)
-                if not ruta:
-                    self.logger.warning(f"🚫 No se encontró ruta para {clave}")
-                    continue
+            self.ruta_salida = ruta[0] if isinstance(ruta, tuple) else ruta
+            self.contexto["ruta_descarga"] = self.ruta_salida
+            self.contexto["clave_cuenta"] = clave
+            self.logger.info(f"📁 Usando ruta: {self.ruta_salida}")
 
-                self.ruta_salida = ruta[0] if isinstance(ruta, tuple) else ruta
-                self.contexto["ruta_descarga"] = self.ruta_salida
-                self.logger.info(f"📁 Usando ruta: {self.ruta_salida}")
-
-                botones = await contenedor_objetivo.query_selector_all(button_selector)
-                boton_clickable = None
-                for boton in botones:
-                    try:
-                        texto_boton = (await boton.inner_text()).strip().lower()
-                        if button_text in texto_boton:
-                            boton_clickable = boton
-                            break
-                    except:
-                        continue
-
-                if boton_clickable:
-                    try:
-                        await boton_clickable.click()
-                        await self.run_flow(pasos_descarga)
-                    except Exception as e:
-                        self.logger.error(f"❌ Error al hacer click: {e}")
-                        continue
-                else:
-                    self.logger.warning(f"❌ No se encontró botón con texto '{button_text}' en cuenta {nro_cuenta}")
+            boton = contenedor_objetivo.locator(button_selector).filter(has_text=patron_boton).first
+            if not await boton.count():
+                self.logger.warning(f"❌ No se encontró botón con texto '{button_text}' en cuenta {nro_cuenta}")
+                continue
 
-            break
+            try:
+                await boton.click()
+                await self.run_flow(pasos_descarga)
+            except Exception as e:
+                self.logger.error(f"❌ Error al hacer click: {e}")
+                continue
+
+        self.logger.info(f"📊 Atlas: {recargas} recargas del listado, {self.recargas_evitadas} evitadas.")
+
+    async def esperar_selector(self, selector: str, clave: str, defecto: int, propagar: bool = False, **kwargs):
+        """wait_for_selector con timeout aprendido del historial del banco para `clave` (target)."""
+        historial = latencias_actuales.get()
+        if not historial or not clave:
+            return await self.page.wait_for_selector(selector, timeout=defecto, **kwargs)
+
+        timeout = historial.timeout(clave, defecto)
+        if not propagar:
+            # Si el handler se traga el vencimiento, un timeout más corto saltaría el paso en silencio:
+            # solo se permite extenderlo
+            timeout = max(timeout, defecto)
+        inicio = time.perf_counter()
+        try:
+            elemento = await self.page.wait_for_selector(selector, timeout=timeout, **kwargs)
+        except Exception:
+            # Solo cuenta como vencimiento si se agotó el tiempo (no un selector inválido o página cerrada)
+            if (time.perf_counter() - inicio) * 1000 >= timeout:
+                historial.vencido(clave)
+                self.logger.warning(f"⏱️ {clave} no apareció en {timeout}ms (timeout adaptativo, fijo {defecto}ms)")
+            raise
+        historial.observar(clave, (time.perf_counter() - inicio) * 1000)
+        return elemento
 
-                
-   
-    async def seleccionar_opcion_dropdown(self, target: str, value: str):
+    async def seleccionar_opcion_dropdown(self, target: str, value: str, propagar: bool = False):
         try:
             paso, campo = target.split(".")
             selector = self.selectors.get(paso, {}).get(campo)
@@ -363,128 +464,201 @@ class ActionExecutor:
 
             # Esperar que se despliegue y aparezca la opción con el texto deseado
             opcion_selector = f"text={value}"
-            await self.page.wait_for_selector(opcion_selector, timeout=12000)
+            await self.esperar_selector(opcion_selector, f"{target}:opcion", 12000, propagar)
             await self.page.click(opcion_selector)
             self.logger.info(f"✅ Opción seleccionada: {value}")
 
         except Exception as e:
+            self.error_paso = e
             self.logger.error(f"❌ Error al seleccionar opción en dropdown para '{target}': {e}")
+            if propagar:
+                raise
+
+
+
+
+    def _acciones(self):
+        return {
+            "goto": self._accion_goto,
+            "fill": self._accion_fill,
+            "type": self._accion_type,
+            "click": self._accion_click,
+            "wait_for": self._accion_wait_for,
+            "buscar": self._accion_buscar,
+            "wait_time": self._accion_wait_time,
+            "wait_network_idle": self._accion_esperar_condicion,
+            "wait_response": self._accion_esperar_condicion,
+            "wait_stable": self._accion_esperar_condicion,
+            "wait_detached": self._accion_esperar_condicion,
+            "wait_download": self._accion_esperar_condicion,
+            "keyboard_press": self._accion_keyboard_press,
+            "type_virtual_password": self._accion_type_virtual_password,
+            "type_virtual_pin": self._accion_type_virtual_pin,
+            "descargar_y_guardar": self._accion_descargar_y_guardar,
+            "seleccionar_opcion_dropdown": self._accion_seleccionar_opcion_dropdown,
+        }
 
+    def _valor(self, paso: PasoCompilado):
+        if paso.variable is None:
+            return paso.value
+        resolved = self.credentials.get(paso.variable) or self.contexto.get(paso.variable)
+        return str(resolved) if resolved is not None else ""
 
+    async def _accion_goto(self, paso, selector, value):
+        self.logger.info(f"🌍 Navegando a {value}")
+        await self.page.goto(value, timeout=60000, wait_until="domcontentloaded")
 
+    async def _accion_fill(self, paso, selector, value):
+        self.logger.info(f"📝 Llenando {selector} con '{value}'")
 
-    async def execute_step(self, step):
-        action = step.get("action")
         try:
-            selector = self.get_selector(step.get("target")) if step.get("target") else None
-            value = self.resolve_variable(step.get("value")) if step.get("value") else None
-
-            if action == "goto":
-                self.logger.info(f"🌍 Navegando a {value}")
-                await self.page.goto(value, timeout=60000, wait_until="domcontentloaded")
-
-            elif action == "fill":
-                self.logger.info(f"📝 Llenando {selector} con '{value}'")
-
-                try:
-                    # Esperar a que el selector sea visible
-                    elemento = await self.page.wait_for_selector(selector, state="visible", timeout=10000)
-                    # Esperar a que el input no esté deshabilitado
-                    await self.page.wait_for_function("element => !element.disabled", arg=elemento, timeout=5000)
-                    # Hacer scroll hasta el campo por si está fuera de pantalla
-                    await elemento.scroll_into_view_if_needed()
-                    # Limpiar primero el campo (opcional)
-                    await self.page.fill(selector, "")
-                    # Finalmente, escribir
-                    await self.page.fill(selector, value)
-                    self.logger.info(f"✅ Campo llenado correctamente: {selector}")
-                except Exception as e:
-                    self.logger.error(f"❌ Error al llenar campo {selector}: {e}")
-
-
-            elif action == "type":
-                await self.page.click(selector)
-                await self.page.fill(selector, "")
-                await self.page.type(selector, value, delay=100)
-                self.logger.info(f"⌨️ Escribiendo (type) en {selector}: {value}")
-
-            elif action == "click":
-                self.logger.info(f"🖱️ Intentando click en {selector}")
-                try:
-                    # Esperar a que el selector esté presente en el DOM (aunque no visible aún)
-                    await self.page.wait_for_selector(selector, timeout=20000)
-
-                    # Intentar esperar visibilidad y disponibilidad normal
-                    try:
-                        elemento = await self.page.wait_for_selector(selector, state="visible", timeout=5000)
-                        await self.page.wait_for_function("el => !el.disabled", arg=elemento, timeout=2000)
-                        await elemento.scroll_into_view_if_needed()
-                        await elemento.click(force=True)
-                        self.logger.info(f"✅ Click exitoso en {selector}")
-                    except Exception as e_visibilidad:
-                        self.logger.warning(f"⚠️ Elemento no visible o no interactivo: {e_visibilidad}")
-                        self.logger.info(f"🛠️ Intentando forzar click con JavaScript en {selector}...")
-                        await self.page.evaluate(f'''
-                            const el = document.querySelector("{selector}");
-                            if (el) el.click();
-                        ''')
-                        self.logger.info(f"✅ Click forzado con JS en {selector}")
-
-                except Exception as e:
-                    self.logger.error(f"❌ Error al hacer click en {selector}: {e}")
-
-            elif action == "wait_for":
-                self.logger.info(f"⏳ Esperando selector {selector}")
-                await self.page.wait_for_selector(selector)
-            elif action == "buscar":
-                self.logger.info(f"🔍 Buscando selector {selector} con timeout extendido")
-                try:
-                    await self.page.wait_for_selector(selector, timeout=30000, state="visible")
-                    self.logger.info(f"✅ Selector encontrado: {selector}")
-                except Exception as e:
-                    self.logger.error(f"❌ No se encontró el selector {selector} en el tiempo esperado: {e}")
-
-            elif action == "wait_time":
-                tiempo = int(value) if value else 1000
-                self.logger.info(f"⏳ Esperando {tiempo}ms")
-                await self.page.wait_for_timeout(tiempo)
-
-            elif action == "keyboard_press":
-                await self.page.keyboard.press(value)
-                self.logger.info(f"⌨️ Presionada tecla: {value}")
-
-            elif action == "type_virtual_password":
-                from application.actions.basa_actions import BasaActions
-                executor = BasaActions(self.credentials, self.selectors, flow={}, contexto=self.contexto)
-                await executor.ingresar_password_virtual(self.page, self.credentials["password"])
+            # Esperar a que el selector sea visible
+            elemento = await self.esperar_selector(selector, paso.target or selector, 10000, paso.propagar_error, state="visible")
+            # Esperar a que el input no esté deshabilitado
+            await self.page.wait_for_function("element => !element.disabled", arg=elemento, timeout=5000)
+            # Hacer scroll hasta el campo por si está fuera de pantalla
+            await elemento.scroll_into_view_if_needed()
+            # Limpiar primero el campo (opcional)
+            await self.page.fill(selector, "")
+            # Finalmente, escribir
+            await self.page.fill(selector, value)
+            self.logger.info(f"✅ Campo llenado correctamente: {selector}")
+        except Exception as e:
+            self.error_paso = e
+            self.logger.error(f"❌ Error al llenar campo {selector}: {e}")
+            if paso.propagar_error:
+                raise
+
+    async def _accion_type(self, paso, selector, value):
+        await self.page.click(selector)
+        await self.page.fill(selector, "")
+        await self.page.type(selector, value, delay=100)
+        self.logger.info(f"⌨️ Escribiendo (type) en {selector}: {value}")
+
+    async def _accion_click(self, paso, selector, value):
+        self.logger.info(f"🖱️ Intentando click en {selector}")
+        try:
+            # Esperar a que el selector esté presente en el DOM (aunque no visible aún)
+            await self.esperar_selector(selector, paso.target or selector, 20000, paso.propagar_error)
 
-            elif action == "type_virtual_pin":
-                from application.actions.itau_actions import ItauActions
-                executor = ItauActions(self.credentials, self.selectors, flow={}, contexto=self.contexto)
-                await executor.ingresar_pin_virtual(self.page, self.credentials["password"])
+            # Intentar esperar visibilidad y disponibilidad normal
+            try:
+                elemento = await self.page.wait_for_selector(selector, state="visible", timeout=5000)
+                await self.page.wait_for_function("el => !el.disabled", arg=elemento, timeout=2000)
+                await elemento.scroll_into_view_if_needed()
+                await elemento.click(force=True)
+                self.logger.info(f"✅ Click exitoso en {selector}")
+            except Exception as e_visibilidad:
+                self.logger.warning(f"⚠️ Elemento no visible o no interactivo: {e_visibilidad}")
+                self.logger.info(f"🛠️ Intentando forzar click con JavaScript en {selector}...")
+                await self.page.evaluate(f'''
+                    const el = document.querySelector("{selector}");
+                    if (el) el.click();
+                ''')
+                self.logger.info(f"✅ Click forzado con JS en {selector}")
 
-            elif action == "descargar_y_guardar":
-                ruta = self.resolve_variable(value)
-                if not ruta:
-                    raise ValueError("❌ 'ruta_descarga' no está definido o es vacío.")
-                self.logger.info(f"⬇️ Esperando descarga en: {ruta}")
-                await self.esperar_y_guardar_descarga(selector, ruta)
-            elif action == "seleccionar_opcion_dropdown":
-                await self.seleccionar_opcion_dropdown(step.get("target"), value)
-                
-            elif action == "seleccionar_fecha":
-                target = step.get("target")
-                value = self._parse_value(step.get("value"))
-                await self.seleccionar_fecha(target, value)
+        except Exception as e:
+            self.error_paso = e
+            self.logger.error(f"❌ Error al hacer click en {selector}: {e}")
+            if paso.propagar_error:
+                raise
 
+    async def _accion_wait_for(self, paso, selector, value):
+        self.logger.info(f"⏳ Esperando selector {selector}")
+        await self.page.wait_for_selector(selector)
 
-            else:
-                self.logger.warning(f"⚠️ Acción desconocida: {action}")
+    async def _accion_buscar(self, paso, selector, value):
+        self.logger.info(f"🔍 Buscando selector {selector} con timeout extendido")
+        try:
+            await self.esperar_selector(selector, paso.target or selector, 30000, paso.propagar_error, state="visible")
+            self.logger.info(f"✅ Selector encontrado: {selector}")
+        except Exception as e:
+            self.error_paso = e
+            self.logger.error(f"❌ No se encontró el selector {selector} en el tiempo esperado: {e}")
+            if paso.propagar_error:
+                raise
+
+    async def _accion_wait_time(self, paso, selector, value):
+        tiempo = int(value) if value else 1000
+        self.logger.info(f"⏳ Esperando {tiempo}ms")
+        await self.page.wait_for_timeout(tiempo)
+
+    async def _accion_esperar_condicion(self, paso, selector, value):
+        await self.esperar_condicion(paso.action, paso.opciones, selector, value)
+
+    async def _accion_keyboard_press(self, paso, selector, value):
+        await self.page.keyboard.press(value)
+        self.logger.info(f"⌨️ Presionada tecla: {value}")
+
+    async def _accion_type_virtual_password(self, paso, selector, value):
+        from application.actions.basa_actions import BasaActions
+        executor = BasaActions(self.credentials, self.selectors, flow={}, contexto=self.contexto)
+        await executor.ingresar_password_virtual(self.page, self.credentials["password"])
+
+    async def _accion_type_virtual_pin(self, paso, selector, value):
+        from application.actions.itau_actions import ItauActions
+        executor = ItauActions(self.credentials, self.selectors, flow={}, contexto=self.contexto)
+        await executor.ingresar_pin_virtual(self.page, self.credentials["password"])
+
+    async def _accion_descargar_y_guardar(self, paso, selector, value):
+        if not value:
+            raise ValueError("❌ 'ruta_descarga' no está definido o es vacío.")
+        self.logger.info(f"⬇️ Esperando descarga en: {value}")
+        await self.esperar_y_guardar_descarga(selector, value)
+
+    async def _accion_seleccionar_opcion_dropdown(self, paso, selector, value):
+        await self.seleccionar_opcion_dropdown(paso.target, value, paso.propagar_error)
+
+    async def ejecutar_paso(self, paso: PasoCompilado):
+        grabador = grabador_trazas_actual.get()
+        if grabador:
+            await grabador.antes_de_paso(paso.describir())
+
+        token_log = paso_log.set((paso, self.contexto.get("clave_cuenta")))
+        self.error_paso = None
+        inicio = time.perf_counter()
+        resultado = "ok"
+        error = None
+
+        async def intento():
+            # Cada intento parte limpio: un reintento exitoso no deja el fallo del anterior
+            self.error_paso = None
+            return await self._handlers[paso.action](paso, paso.selector, self._valor(paso))
 
+        try:
+            await ejecutar_con_reintentos(
+                intento,
+                paso.reintento,
+                paso.describir(),
+                self.logger
+            )
         except Exception as e:
-            self.logger.error(f"❌ Error al ejecutar acción '{action}': {e}")
+            resultado = "error"
+            error = e
+            self.logger.error(f"❌ Error al ejecutar acción '{paso.action}': {e}")
             raise
-        
+        finally:
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            registro = metricas_actuales.get()
+            if registro:
+                registro.registrar(
+                    paso.fase,
+                    paso.action,
+                    paso.target,
+                    self.contexto.get("clave_cuenta"),
+                    resultado,
+                    duracion_ms
+                )
+            if grabador:
+                # Un fallo registrado por el handler sin propagarlo también deja la traza
+                await grabador.despues_de_paso(paso.describir(), duracion_ms, error or self.error_paso)
+            # Evento por paso en DEBUG (muestreado por LOG_MUESTREO_DEBUG); sin formateo si no está habilitado
+            self.logger.debug("⏱️ %s %s en %.0fms", paso.action, resultado, duracion_ms)
+            paso_log.reset(token_log)
+
+    async def execute_step(self, step):
+        await self.ejecutar_paso(compilar_paso(step, self.selectors))
+
     def _parse_value(self, value: str) -> str:
 
         if isinstance(value, str) and value.startswith("$"):
@@ -497,9 +671,31 @@ class ActionExecutor:
 
 
     async def run_flow(self, flow: list):
-        for step in flow:
-            action = step.get("action")
-            target = step.get("target")
-            value = step.get("value")
-            print(f"[⚙️] Ejecutando: {action} -> {target or ''} = {value or ''}")
-            await self.execute_step(step)
+        pasos = compilar_flujo(flow, self.selectors)
+        reanudacion = pasos.reanudacion
+        checkpoint = 0
+        intento = 1
+        indice = 0
+
+        while indice < len(pasos):
+            paso = pasos[indice]
+            self.logger.debug("[⚙️] Ejecutando: %s", paso)
+            try:
+                await self.ejecutar_paso(paso)
+            except Exception as e:
+                if not reanudacion or intento >= reanudacion.intentos:
+                    raise
+                espera = reanudacion.espera(intento)
+                intento += 1
+                # Se retoma desde el último checkpoint, no desde el inicio de la fase
+                self.logger.warning(
+                    f"🔁 Reanudando {pasos.fase or 'flow'} desde el paso {checkpoint} "
+                    f"(intento {intento}/{reanudacion.intentos}) en {espera:.1f}s: {e}"
+                )
+                await asyncio.sleep(espera)
+                indice = checkpoint
+                continue
+
+            indice += 1
+            if paso.checkpoint:
+                checkpoint = indice
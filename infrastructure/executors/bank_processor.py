@@ -1,63 +1,187 @@
+import asyncio
 import logging
+import os
+import time
+from dataclasses import dataclass, replace
 from datetime import datetime
+from typing import Optional
 from utils.config import (
     get_credentials,
-    load_selectors,
+    get_pestanas_descarga,
+    load_selectors_banco,
     load_flow,
-    BASE_DIR
+    BASE_DIR,
+    POST_DESCARGA_WORKERS,
+    POST_DESCARGA_MAX_PENDIENTES,
+    CONVERTIR_EXTRACTOS,
+    NORMALIZAR_EXTRACTOS,
+    TRAZAS_PASOS,
+    TRAZAS_UMBRAL_MS,
+    TIMEOUT_ADAPTATIVO
 )
 from services.periodo_services import generar_periodo
-from services.ruta_service import generar_ruta_archivo, generar_clave_cuenta
+from services.ruta_service import generar_ruta_archivo, generar_clave_cuenta, crear_directorios
 from services.context_service import ContextoEjecucion
 from services.cuentas_services import obtener_cuentas_por_banco
+from services.manifest_service import ManifestDescargas
+from services.reporte_service import ReporteEjecucion
 from infrastructure.browser.browser_manager import BrowserManager
+from infrastructure.browser.trazas import GrabadorTrazas, grabador_trazas_actual
+from infrastructure.executors.action_executor import ActionExecutor
+from infrastructure.executors.flow_compiler import compilar_flujos, RETRY_FASE
+from infrastructure.executors.reintentos import PoliticaReintento
+from infrastructure.executors.post_descarga import PipelinePostDescarga
+from infrastructure.metrics.metricas import RegistroMetricas, metricas_actuales
+from infrastructure.metrics.latencias import HistorialLatencias, latencias_actuales
+from infrastructure.logger.logging_config import banco_log
 from domain.strategy_factory import get_strategy
 
+@dataclass
+class TrabajoPeriodo:
+    fecha_inicio: datetime
+    fecha_fin: datetime
+    mes: str
+    clave: str
+    manifest: ManifestDescargas
+    cuentas: list
+    rutas: dict
+    omitidas: int
+    desde: float = 0.0
+    error: Optional[Exception] = None
+
 class BankProcessor:
-    def __init__(self, nombre_banco):
+    def __init__(self, nombre_banco, pool=None, periodo=None, claves_cuentas=None, etiqueta=None):
         self.logger = logging.getLogger(__name__)
         self.nombre_banco = nombre_banco.lower()
         self.credentials = get_credentials(self.nombre_banco)
-        self.selectors = load_selectors().get(self.nombre_banco)
-        self.flow = load_flow(self.nombre_banco)
+        self.selectors = load_selectors_banco(self.nombre_banco)
+        if not self.selectors:
+            raise ValueError(f"❌ Selectores no definidos para banco: {self.nombre_banco}")
+        # Los flows se compilan una sola vez: selectores resueltos y validación anticipada
+        self.flow = compilar_flujos(load_flow(self.nombre_banco), self.selectors)
         self.cuentas = obtener_cuentas_por_banco(self.nombre_banco)
-        self.fecha_inicio, self.fecha_fin, self.mes = generar_periodo()
-        self.logger.info(f"Fecha calculada para fecha_fin: {self.fecha_fin}")
+        if claves_cuentas is not None:
+            # Shard: solo el lote de cuentas asignado a este proceso
+            claves_cuentas = set(claves_cuentas)
+            self.cuentas = [c for c in self.cuentas if generar_clave_cuenta(c) in claves_cuentas]
+        self.etiqueta = etiqueta
+        # periodo: (fecha_inicio, fecha_fin, mes) o una lista de ellos para backfill en una sola sesión
+        self.periodos = periodo if isinstance(periodo, list) else [periodo or generar_periodo()]
+        self.fecha_inicio, self.fecha_fin, self.mes = self.periodos[0]
+        self.logger.info(f"Fecha calculada para fecha_fin: {self.periodos[-1][1]} ({len(self.periodos)} períodos)")
         self.base_dir = BASE_DIR
+        self.error = None
+        self.ruta_reporte = None
+        self.pool = pool
+        self.pestanas = get_pestanas_descarga(self.nombre_banco)
 
-        if not self.selectors:
-            raise ValueError(f"❌ Selectores no definidos para banco: {self.nombre_banco}")
+    def _generar_rutas(self, cuentas: list, fecha: datetime) -> dict:
+        rutas_por_cuenta = {}
+        for cuenta in cuentas:
+            clave = generar_clave_cuenta(cuenta)
+            rutas_por_cuenta[clave] = generar_ruta_archivo(
+                base_dir=self.base_dir,
+                banco=self.nombre_banco,
+                tipo_archivo="EXTRACTO",
+                tipo_cuenta=cuenta.get("TIPOCUENTA", ""),
+                nro_cuenta=cuenta.get("NROCUENTA", ""),
+                tipo_moneda=cuenta.get("MONEDA", ""),
+                fecha=fecha,
+                crear_directorio=False
+            )
+        return rutas_por_cuenta
+
+    def _preparar_periodo(self, periodo: tuple) -> TrabajoPeriodo:
+        fecha_inicio, fecha_fin, mes = periodo
+        clave = f"{fecha_inicio:%Y-%m-%d}_{fecha_fin:%Y-%m-%d}"
+        rutas_por_cuenta = self._generar_rutas(self.cuentas, fecha_fin)
+        manifest = ManifestDescargas(self.nombre_banco, clave)
+        claves_pendientes = manifest.pendientes(rutas_por_cuenta)
+        cuentas = [c for c in self.cuentas if generar_clave_cuenta(c) in claves_pendientes]
+        return TrabajoPeriodo(
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            mes=mes,
+            clave=clave,
+            manifest=manifest,
+            cuentas=cuentas,
+            rutas={clave_cuenta: rutas_por_cuenta[clave_cuenta] for clave_cuenta in claves_pendientes},
+            omitidas=len(self.cuentas) - len(cuentas)
+        )
+
+    def _contexto_periodo(self, trabajo: TrabajoPeriodo, pipeline) -> ContextoEjecucion:
+        return ContextoEjecucion(
+            cuentas=trabajo.cuentas,
+            fecha_inicio=trabajo.fecha_inicio.strftime("%Y-%m-%d"),
+            fecha_fin=trabajo.fecha_fin.strftime("%Y-%m-%d"),
+            mes=trabajo.mes,
+            banco=self.nombre_banco,
+            base_dir=self.base_dir,
+            rutas_por_cuenta=trabajo.rutas,
+            dia_inicio=str(trabajo.fecha_inicio.day),
+            dia_fin=str(trabajo.fecha_fin.day),
+            post_descarga=pipeline
+        )
 
     async def ejecutar(self):
+        # Cada registro de log emitido durante la ejecución lleva el banco
+        token_log = banco_log.set(self.nombre_banco)
+        try:
+            return await self._ejecutar()
+        finally:
+            banco_log.reset(token_log)
+
+    async def _ejecutar(self):
         self.logger.info(f"🚀 Iniciando procesamiento para banco: {self.nombre_banco.upper()}")
-        browser = BrowserManager(headless=False)
-        page = await browser.get_new_page()
 
-        try:
-            rutas_por_cuenta = {}
-            for cuenta in self.cuentas:
-                clave = generar_clave_cuenta(cuenta)
-                rutas_por_cuenta[clave] = generar_ruta_archivo(
-                    base_dir=self.base_dir,
-                    banco=self.nombre_banco,
-                    tipo_archivo="EXTRACTO",
-                    tipo_cuenta=cuenta.get("TIPOCUENTA", ""),
-                    nro_cuenta=cuenta.get("NROCUENTA", ""),
-                    tipo_moneda=cuenta.get("MONEDA", ""),
-                    fecha=self.fecha_fin
-                )
+        todos = [await asyncio.to_thread(self._preparar_periodo, periodo) for periodo in self.periodos]
+        trabajos = [trabajo for trabajo in todos if trabajo.cuentas]
+        omitidas = sum(trabajo.omitidas for trabajo in todos)
+        if not trabajos:
+            self.logger.info(f"✅ Todas las cuentas de {self.nombre_banco.upper()} ya están descargadas y verificadas. Se omite el navegador.")
+            return True
+        if omitidas:
+            self.logger.info(f"⏭️ {omitidas} descargas ya verificadas en el manifest, quedan {sum(len(t.cuentas) for t in trabajos)}.")
+        # BASE_DIR suele ser un recurso de red: las carpetas se crean fuera del event loop
+        await asyncio.to_thread(crear_directorios, [ruta for trabajo in trabajos for ruta in trabajo.rutas.values()])
 
-            contexto = ContextoEjecucion(
-                cuentas=self.cuentas,
-                fecha_inicio=self.fecha_inicio.strftime("%Y-%m-%d"),
-                fecha_fin=self.fecha_fin.strftime("%Y-%m-%d"),
-                mes=self.mes,
-                banco=self.nombre_banco,
-                base_dir=self.base_dir,
-                rutas_por_cuenta=rutas_por_cuenta,
-                dia_inicio=str(self.fecha_inicio.day),
-                dia_fin=str(self.fecha_fin.day)
+        inicio_ejecucion = time.time()
+        metricas = RegistroMetricas(self.nombre_banco, self.etiqueta)
+        token_metricas = metricas_actuales.set(metricas)
+        latencias = await asyncio.to_thread(HistorialLatencias, self.nombre_banco) if TIMEOUT_ADAPTATIVO else None
+        token_latencias = latencias_actuales.set(latencias)
+        reporte = ReporteEjecucion(self.nombre_banco, self.etiqueta)
+        claves = [trabajo.clave for trabajo in todos]
+        reporte.definir("periodo", claves[0] if len(claves) == 1 else claves)
+        reporte.definir("cuentas_omitidas", omitidas)
+        pipeline = await PipelinePostDescarga(
+            workers=POST_DESCARGA_WORKERS,
+            max_pendientes=POST_DESCARGA_MAX_PENDIENTES,
+            convertir=CONVERTIR_EXTRACTOS,
+            reporte=reporte
+        ).iniciar()
+
+        browser = BrowserManager(headless=False, pool=self.pool)
+        config_sesion = self.flow.get("session") or {}
+        grabador = None
+        token_trazas = None
+
+        try:
+            context = await browser.create_browser_context(
+                self.nombre_banco,
+                ttl_sesion=config_sesion.get("ttl_minutes")
             )
+            page = await context.new_page()
+
+            if TRAZAS_PASOS > 0:
+                # Los chunks de tracing son por contexto: con varias pestañas se solaparían
+                if self.pestanas > 1:
+                    self.logger.warning("⚠️ Tracing en anillo desactivado: no es compatible con descargas en varias pestañas.")
+                else:
+                    grabador = await GrabadorTrazas(context, self.nombre_banco, TRAZAS_PASOS, TRAZAS_UMBRAL_MS).iniciar()
+                    token_trazas = grabador_trazas_actual.set(grabador)
+
+            contexto = self._contexto_periodo(trabajos[0], pipeline)
 
             self.logger.info("Obteniendo estrategia para el banco.")
             strategy = get_strategy(
@@ -72,32 +196,219 @@ class BankProcessor:
                 self.logger.info("Configurando contexto en la estrategia.")
                 strategy.set_contexto(**contexto.to_dict())
 
-            self.logger.info("Iniciando login.")
+            sesion_reutilizada = False
+            if config_sesion and browser.cookies_cargadas:
+                executor = ActionExecutor(page, self.selectors, self.credentials)
+                sesion_reutilizada = await executor.verificar_sesion(config_sesion)
+                if not sesion_reutilizada:
+                    await browser.discard_context_storage(self.nombre_banco)
 
-            if self.nombre_banco in ["sudameris", "basa"]:
-                await strategy.login(page, browser)
+            if sesion_reutilizada:
+                self.logger.info("♻️ Sesión almacenada vigente, se omite el login.")
             else:
-                await strategy.login(page)
+                self.logger.info("Iniciando login.")
 
-            self.logger.info("Login completado.")
+                with metricas.medir_fase("login"):
+                    if self.nombre_banco in ["sudameris", "basa"]:
+                        await strategy.login(page, browser)
+                    else:
+                        await strategy.login(page)
 
-            self.logger.info("Ejecutando pre-descarga.")
-            await strategy.pre_download(page)
-            self.logger.info("Pre-descarga completada.")
+                if config_sesion:
+                    await browser.save_context_storage(self.nombre_banco)
 
-            self.logger.info("Iniciando descarga de reportes.")
-            await strategy.descargar_reportes(page)
-            self.logger.info("Descarga de reportes completada.")
+                self.logger.info("Login completado.")
+
+            url_post_login = page.url
+
+            for indice, trabajo in enumerate(trabajos):
+                if indice > 0:
+                    # Cada período vuelve al inicio autenticado: sin repetir login
+                    self.logger.info(f"📆 Período {trabajo.clave} ({indice + 1}/{len(trabajos)}).")
+                    contexto = self._contexto_periodo(trabajo, pipeline)
+                    strategy = get_strategy(self.nombre_banco, self.credentials, self.selectors, self.flow, contexto)
+                    if hasattr(strategy, "set_contexto"):
+                        strategy.set_contexto(**contexto.to_dict())
+                    await page.goto(url_post_login, timeout=60000, wait_until="domcontentloaded")
+
+                trabajo.desde = time.time()
+                try:
+                    self.logger.info("Ejecutando pre-descarga.")
+                    with metricas.medir_fase("pre_download"):
+                        await strategy.pre_download(page)
+                    self.logger.info("Pre-descarga completada.")
 
-            self.logger.info("Iniciando logout.")
-            await strategy.logout(page)
-            self.logger.info("Logout completado.")
+                    self.logger.info("Iniciando descarga de reportes.")
+                    with metricas.medir_fase("download"):
+                        await self._descargar_con_reanudacion(page, strategy, contexto, url_post_login, trabajo.desde)
+                    self.logger.info("Descarga de reportes completada.")
+                except Exception as e:
+                    if len(trabajos) == 1:
+                        raise
+                    # En backfill un período fallido no descarta los siguientes
+                    trabajo.error = e
+                    self.logger.exception(f"❌ Período {trabajo.clave} falló: {e}")
+
+            fallidos = [trabajo for trabajo in trabajos if trabajo.error]
+            if fallidos:
+                self.error = RuntimeError(
+                    f"{len(fallidos)}/{len(trabajos)} períodos con error: "
+                    + ", ".join(f"{t.clave} ({t.error})" for t in fallidos)
+                )
+
+            if config_sesion.get("keep_alive"):
+                # Se conserva la sesión para la próxima ejecución en lugar de cerrarla
+                await browser.save_context_storage(self.nombre_banco)
+                self.logger.info("Sesión conservada, se omite el logout.")
+            else:
+                self.logger.info("Iniciando logout.")
+                with metricas.medir_fase("logout"):
+                    await strategy.logout(page)
+                # Tras el logout las cookies guardadas ya no sirven
+                await browser.discard_context_storage(self.nombre_banco)
+                self.logger.info("Logout completado.")
 
             self.logger.info(f"✅ Procesamiento finalizado para banco: {self.nombre_banco.upper()}")
+            return self.error is None
 
         except Exception as e:
+            self.error = e
             self.logger.exception(f"❌ Error durante ejecución del banco {self.nombre_banco.upper()}: {e}")
+            return False
 
         finally:
+            if grabador:
+                await grabador.cerrar()
+                grabador_trazas_actual.reset(token_trazas)
             self.logger.info("Cerrando navegador.")
             await browser.close_browser()
+            # Se drena el pipeline antes de conciliar: la conversión puede reescribir archivos
+            await pipeline.cerrar()
+            for trabajo in trabajos:
+                error = trabajo.error or self.error
+                await asyncio.to_thread(
+                    trabajo.manifest.conciliar,
+                    trabajo.rutas,
+                    trabajo.desde or inicio_ejecucion,
+                    str(error) if error else None,
+                    pipeline.resultados
+                )
+            if NORMALIZAR_EXTRACTOS:
+                # pandas/pyarrow solo se importan si la normalización está activa
+                from services.normalizador_service import normalizar_periodo
+                normalizacion = {}
+                for trabajo in trabajos:
+                    if trabajo.error or (self.error and len(trabajos) == 1):
+                        continue
+                    try:
+                        normalizacion[trabajo.clave] = await asyncio.to_thread(
+                            normalizar_periodo, self.base_dir, trabajo.fecha_fin, [self.nombre_banco]
+                        )
+                    except Exception as e:
+                        self.logger.error(f"❌ Error normalizando extractos {trabajo.clave}: {e}")
+                        normalizacion[trabajo.clave] = {"error": str(e)}
+                if normalizacion:
+                    reporte.definir("normalizacion", normalizacion if len(trabajos) > 1 else next(iter(normalizacion.values())))
+            reporte.definir("exito", self.error is None)
+            reporte.definir("error", str(self.error) if self.error else None)
+            reporte.definir("fases_ms", metricas.resumen()["fases_ms"])
+            try:
+                reporte.definir("metricas", {
+                    "json": await asyncio.to_thread(metricas.exportar_json),
+                    "prometheus": await asyncio.to_thread(metricas.exportar_prometheus)
+                })
+            except Exception as e:
+                self.logger.error(f"❌ Error exportando métricas: {e}")
+            metricas_actuales.reset(token_metricas)
+            if latencias:
+                try:
+                    reporte.definir("latencias", {
+                        "json": await asyncio.to_thread(latencias.guardar),
+                        "targets": latencias.resumen()
+                    })
+                except Exception as e:
+                    self.logger.error(f"❌ Error guardando latencias: {e}")
+            latencias_actuales.reset(token_latencias)
+            self.ruta_reporte = await asyncio.to_thread(reporte.guardar)
+            self.logger.info(f"📄 Reporte de ejecución: {self.ruta_reporte}")
+
+    async def _descargar(self, page, strategy, contexto, url_post_login):
+        if self.pestanas > 1 and len(contexto.cuentas) > 1:
+            await self._descargar_en_pestanas(page, contexto, url_post_login)
+        else:
+            await strategy.descargar_reportes(page)
+
+    async def _descargar_con_reanudacion(self, page, strategy, contexto, url_post_login, desde):
+        politica = PoliticaReintento.desde_dict((self.flow.get("retry") or {}).get(RETRY_FASE))
+        intentos = politica.intentos if politica else 1
+
+        for intento in range(1, intentos + 1):
+            try:
+                await self._descargar(page, strategy, contexto, url_post_login)
+                return
+            except Exception as e:
+                if intento >= intentos:
+                    raise
+
+                # Checkpoint por cuenta: solo se reintentan las que no dejaron archivo en esta ejecución
+                restantes = await asyncio.to_thread(self._cuentas_sin_descargar, contexto, desde)
+                if not restantes:
+                    return
+                espera = politica.espera(intento)
+                self.logger.warning(
+                    f"🔁 Descarga interrumpida ({e}). Reanudando {len(restantes)} cuentas "
+                    f"sin repetir login (intento {intento + 1}/{intentos}) en {espera:.1f}s."
+                )
+                await asyncio.sleep(espera)
+
+                contexto = replace(contexto, cuentas=restantes)
+                strategy = get_strategy(self.nombre_banco, self.credentials, self.selectors, self.flow, contexto)
+                await page.goto(url_post_login, timeout=60000, wait_until="domcontentloaded")
+                await strategy.pre_download(page)
+
+    @staticmethod
+    def _cuentas_sin_descargar(contexto, desde: float) -> list:
+        restantes = []
+        for cuenta in contexto.cuentas:
+            ruta = contexto.rutas_por_cuenta.get(generar_clave_cuenta(cuenta))
+            if not ruta or not os.path.exists(ruta) or os.path.getmtime(ruta) < desde:
+                restantes.append(cuenta)
+        return restantes
+
+    async def _descargar_en_pestanas(self, page, contexto, url_post_login):
+        # Reparto round-robin de cuentas entre pestañas del mismo contexto autenticado
+        lotes = [contexto.cuentas[i::self.pestanas] for i in range(self.pestanas)]
+        lotes = [lote for lote in lotes if lote]
+        self.logger.info(f"🗂️ Descargando {len(contexto.cuentas)} cuentas en {len(lotes)} pestañas.")
+
+        paginas = [page] + [await page.context.new_page() for _ in lotes[1:]]
+
+        async def procesar_lote(pagina, lote, es_principal):
+            estrategia = get_strategy(
+                self.nombre_banco,
+                self.credentials,
+                self.selectors,
+                self.flow,
+                replace(contexto, cuentas=lote)
+            )
+            if not es_principal:
+                await pagina.goto(url_post_login, timeout=60000, wait_until="domcontentloaded")
+                await estrategia.pre_download(pagina)
+            await estrategia.descargar_reportes(pagina)
+
+        try:
+            resultados = await asyncio.gather(
+                *(procesar_lote(pagina, lote, indice == 0) for indice, (pagina, lote) in enumerate(zip(paginas, lotes))),
+                return_exceptions=True
+            )
+        finally:
+            for pagina in paginas[1:]:
+                await pagina.close()
+
+        errores = [r for r in resultados if isinstance(r, Exception)]
+        for indice, resultado in enumerate(resultados):
+            if isinstance(resultado, Exception):
+                self.logger.error(f"❌ Pestaña {indice + 1} falló: {resultado}")
+        if errores:
+            # Con una sola pestaña caída también se propaga: la reanudación retoma sus cuentas pendientes
+            raise RuntimeError(f"{len(errores)}/{len(resultados)} pestañas fallaron: {errores[0]}") from errores[0]
@@ -0,0 +1,54 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Una sola ida y vuelta al navegador: textos de todos los contenedores y el índice
+# del botón de acción dentro de cada uno.
+_JS_EXTRAER_CONTENEDORES = """
+(elementos, args) => elementos.map((el, indice) => {
+    let indiceBoton = -1;
+    if (args.botonSelector) {
+        let botones = [];
+        try {
+            botones = Array.from(el.querySelectorAll(args.botonSelector));
+        } catch (e) {
+            botones = [];
+        }
+        indiceBoton = botones.findIndex(
+            b => (b.innerText || "").trim().toLowerCase().includes(args.botonTexto)
+        );
+    }
+    return { indice, texto: el.innerText || "", indiceBoton };
+})
+"""
+
+PATRON_CUENTA = re.compile(r"\d{6,}")
+
+@dataclass
+class ContenedorCuenta:
+    indice: int
+    texto: str
+    nro_cuenta: Optional[int]
+    indice_boton: Optional[int]
+
+def parsear_nro_cuenta(texto: str) -> Optional[int]:
+    posibles = PATRON_CUENTA.findall(texto)
+    return int(posibles[0]) if posibles else None
+
+async def extraer_contenedores(page, list_selector: str, button_selector: str = None, button_text: str = "") -> list:
+    crudos = await page.eval_on_selector_all(
+        list_selector,
+        _JS_EXTRAER_CONTENEDORES,
+        {"botonSelector": button_selector, "botonTexto": (button_text or "").strip().lower()}
+    )
+
+    contenedores = []
+    for crudo in crudos:
+        texto = crudo["texto"].replace("\xa0", " ").upper()
+        contenedores.append(ContenedorCuenta(
+            indice=crudo["indice"],
+            texto=texto,
+            nro_cuenta=parsear_nro_cuenta(texto),
+            indice_boton=crudo["indiceBoton"] if crudo["indiceBoton"] >= 0 else None
+        ))
+    return contenedores
@@ -0,0 +1,152 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from infrastructure.executors.reintentos import PoliticaReintento
+
+class FlowValidationError(ValueError):
+    pass
+
+logger = logging.getLogger(__name__)
+
+# Claves del bloque "retry" del flow que no son acciones
+RETRY_REANUDACION = "resume"
+RETRY_FASE = "phase"
+# Fase que envuelve la reanudación por cuenta de BankProcessor (retry.phase)
+FASE_DESCARGA = "download"
+
+# acción -> (requiere target, requiere value)
+ACCIONES = {
+    "goto": (False, True),
+    "fill": (True, True),
+    "type": (True, True),
+    "click": (True, False),
+    "wait_for": (True, False),
+    "buscar": (True, False),
+    "wait_time": (False, False),
+    "wait_network_idle": (False, False),
+    "wait_response": (False, True),
+    "wait_stable": (True, False),
+    "wait_detached": (True, False),
+    "wait_download": (True, False),
+    "keyboard_press": (False, True),
+    "type_virtual_password": (False, False),
+    "type_virtual_pin": (False, False),
+    "descargar_y_guardar": (True, True),
+    "seleccionar_opcion_dropdown": (True, True),
+}
+
+@dataclass(frozen=True)
+class PasoCompilado:
+    action: str
+    indice: int
+    fase: Optional[str] = None
+    target: Optional[str] = None
+    selector: Optional[str] = None
+    value: Any = None
+    variable: Optional[str] = None
+    reintento: Optional[PoliticaReintento] = None
+    checkpoint: bool = False
+    # Con una política que pueda actuar, los handlers que registran y siguen (click, fill, ...) propagan el error
+    propagar_error: bool = False
+    opciones: dict = field(default_factory=dict, compare=False)
+
+    def describir(self) -> str:
+        return f"{self.fase or 'flow'}[{self.indice}] {self.action} -> {self.target or ''} = {self.value or ''}"
+
+    # Permite pasar el paso como argumento de logging: solo se formatea si el registro se emite
+    __str__ = describir
+
+class FlujoCompilado(list):
+    """Lista de PasoCompilado con la política de reanudación desde checkpoint de la fase."""
+
+    def __init__(self, pasos=(), fase: str = None, reanudacion: PoliticaReintento = None):
+        super().__init__(pasos)
+        self.fase = fase
+        self.reanudacion = reanudacion
+
+def _politica(datos, ubicacion: str) -> Optional[PoliticaReintento]:
+    try:
+        return PoliticaReintento.desde_dict(datos)
+    except (TypeError, ValueError) as e:
+        raise FlowValidationError(f"❌ {ubicacion}: política 'retry' inválida: {e}")
+
+def resolver_selector(selectors: dict, path: str) -> Optional[str]:
+    if not path:
+        return None
+    selector = selectors
+    for key in path.split("."):
+        selector = selector.get(key, {}) if isinstance(selector, dict) else {}
+    return selector if isinstance(selector, str) else None
+
+def compilar_paso(step: dict, selectors: dict, indice: int = 0, fase: str = None, reintentos: dict = None, estricto: bool = True, propagar: bool = False) -> PasoCompilado:
+    action = step.get("action")
+    ubicacion = f"{fase or 'flow'}[{indice}]"
+
+    if action not in ACCIONES:
+        raise FlowValidationError(f"❌ {ubicacion}: acción desconocida '{action}'.")
+
+    requiere_target, requiere_value = ACCIONES[action]
+    target = step.get("target")
+    raw_value = step.get("value")
+
+    selector = resolver_selector(selectors, target) if target else None
+    if requiere_target and not target:
+        raise FlowValidationError(f"❌ {ubicacion}: la acción '{action}' requiere 'target'.")
+    if target and not selector:
+        if estricto:
+            raise FlowValidationError(f"❌ {ubicacion}: no hay selector definido para '{target}'.")
+        # Flow en construcción ("strict": false): el paso falla al ejecutarse, no al cargar el banco
+        logger.warning(f"⚠️ {ubicacion}: no hay selector definido para '{target}'.")
+    if requiere_value and not raw_value:
+        raise FlowValidationError(f"❌ {ubicacion}: la acción '{action}' requiere 'value'.")
+
+    variable = None
+    value = raw_value if raw_value else None
+    if isinstance(value, str) and value.startswith("$"):
+        variable, value = value[1:], None
+
+    # La política del paso tiene prioridad sobre la declarada para la acción en el flow
+    reintento = _politica(step.get("retry") or (reintentos or {}).get(action), ubicacion)
+
+    return PasoCompilado(
+        action=action,
+        indice=indice,
+        fase=fase,
+        target=target,
+        selector=selector,
+        value=value,
+        variable=variable,
+        reintento=reintento,
+        checkpoint=bool(step.get("checkpoint")),
+        propagar_error=propagar or reintento is not None,
+        opciones=step
+    )
+
+def compilar_flujo(pasos: list, selectors: dict, fase: str = None, reintentos: dict = None, estricto: bool = True) -> FlujoCompilado:
+    if isinstance(pasos, FlujoCompilado):
+        return pasos
+    if pasos and isinstance(pasos[0], PasoCompilado):
+        return FlujoCompilado(pasos, fase)
+
+    reintentos = reintentos or {}
+    for accion in reintentos:
+        if accion not in ACCIONES and accion not in (RETRY_REANUDACION, RETRY_FASE):
+            raise FlowValidationError(f"❌ retry: acción desconocida '{accion}'.")
+
+    # retry.resume de la fase o retry.phase sobre la descarga solo se disparan si el paso falla de verdad
+    propagar = bool(reintentos.get(RETRY_REANUDACION)) or (fase == FASE_DESCARGA and bool(reintentos.get(RETRY_FASE)))
+    return FlujoCompilado(
+        [compilar_paso(step, selectors, indice, fase, reintentos, estricto, propagar) for indice, step in enumerate(pasos or [])],
+        fase,
+        _politica(reintentos.get(RETRY_REANUDACION), f"{fase or 'flow'}.retry.resume")
+    )
+
+def compilar_flujos(flow: dict, selectors: dict) -> dict:
+    """Compila todas las fases (listas de pasos) del flow; el resto de claves se conserva tal cual."""
+    reintentos = flow.get("retry") or {}
+    _politica(reintentos.get(RETRY_FASE), "retry.phase")
+    estricto = flow.get("strict", True)
+    return {
+        fase: compilar_flujo(pasos, selectors, fase, reintentos, estricto) if isinstance(pasos, list) else pasos
+        for fase, pasos in flow.items()
+    }
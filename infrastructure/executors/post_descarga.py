@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from services.manifest_service import calcular_sha256
+
+FIRMA_XLSX = b"PK\x03\x04"
+FIRMA_XLS = b"\xd0\xcf\x11\xe0"
+
+def detectar_formato(ruta: str) -> str:
+    with open(ruta, "rb") as file:
+        cabecera = file.read(512)
+
+    if cabecera.startswith(FIRMA_XLSX):
+        with zipfile.ZipFile(ruta) as libro:
+            return "xlsx" if "[Content_Types].xml" in libro.namelist() else "zip"
+    if cabecera.startswith(FIRMA_XLS):
+        return "xls"
+    if cabecera.lstrip().lower().startswith((b"<", b"\xef\xbb\xbf<")):
+        # Varios portales exportan una tabla HTML con extensión de Excel
+        return "html"
+    return "desconocido"
+
+def _convertir_a_xlsx(ruta: str, formato: str) -> str:
+    import pandas as pd
+
+    if formato == "html":
+        hojas = {f"Hoja{i + 1}": df for i, df in enumerate(pd.read_html(ruta))}
+    else:
+        hojas = pd.read_excel(ruta, sheet_name=None)
+
+    original = f"{os.path.splitext(ruta)[0]}.original.{formato}"
+    temporal = f"{ruta}.tmp.xlsx"
+    with pd.ExcelWriter(temporal, engine="openpyxl") as writer:
+        for nombre, df in hojas.items():
+            df.to_excel(writer, sheet_name=str(nombre)[:31], index=False)
+
+    os.replace(ruta, original)
+    os.replace(temporal, ruta)
+    return original
+
+def procesar_archivo(ruta: str, convertir: bool = False) -> dict:
+    """Se ejecuta en un proceso del pool: integridad, formato, conversión y hash."""
+    resultado = {"ruta": ruta, "estado": "ok", "formato": None, "tamano": 0, "sha256": None, "conversion": None, "error": None}
+    try:
+        if not os.path.exists(ruta):
+            raise FileNotFoundError("Archivo inexistente")
+        if os.path.getsize(ruta) == 0:
+            raise ValueError("Archivo vacío")
+
+        formato = detectar_formato(ruta)
+        resultado["formato"] = formato
+        if formato in ("zip", "desconocido"):
+            raise ValueError(f"Formato no reconocido como extracto Excel ({formato})")
+
+        if convertir and formato != "xlsx" and ruta.lower().endswith(".xlsx"):
+            try:
+                resultado["conversion"] = {"desde": formato, "original": _convertir_a_xlsx(ruta, formato)}
+            except Exception as e:
+                resultado["conversion"] = {"desde": formato, "error": str(e)}
+
+        resultado["tamano"] = os.path.getsize(ruta)
+        resultado["sha256"] = calcular_sha256(ruta)
+    except Exception as e:
+        resultado["estado"] = "invalido"
+        resultado["error"] = str(e)
+    return resultado
+
+class PipelinePostDescarga:
+    """
+    Cola de archivos guardados que se procesan en un pool de procesos mientras
+    el navegador sigue con la próxima cuenta. La cola acotada aplica backpressure:
+    si los workers se atrasan, encolar() espera en lugar de acumular sin límite.
+    """
+
+    def __init__(self, workers: int = 2, max_pendientes: int = 8, convertir: bool = False, reporte=None):
+        self.logger = logging.getLogger(__name__)
+        self.workers = max(1, workers)
+        self.max_pendientes = max(1, max_pendientes)
+        self.convertir = convertir
+        self.reporte = reporte
+        self.resultados = []
+        self.cola = None
+        self.executor = None
+        self.tareas = []
+
+    async def iniciar(self):
+        self.cola = asyncio.Queue(maxsize=self.max_pendientes)
+        # spawn: los workers se crean con el driver de Playwright, el event loop y el hilo de logging vivos
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self.tareas = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        return self
+
+    async def encolar(self, ruta: str):
+        await self.cola.put(ruta)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            ruta = await self.cola.get()
+            try:
+                if ruta is None:
+                    return
+                try:
+                    resultado = await loop.run_in_executor(self.executor, procesar_archivo, ruta, self.convertir)
+                except Exception as e:
+                    resultado = {"ruta": ruta, "estado": "invalido", "error": f"Fallo del worker: {e}"}
+
+                self.resultados.append(resultado)
+                if self.reporte:
+                    self.reporte.agregar("post_descarga", resultado)
+                if resultado["estado"] == "ok":
+                    self.logger.info(f"🧾 Post-descarga OK: {ruta}")
+                else:
+                    self.logger.error(f"❌ Post-descarga inválida: {ruta} | {resultado['error']}")
+            finally:
+                self.cola.task_done()
+
+    async def cerrar(self):
+        if not self.cola:
+            return
+        await self.cola.join()
+        for _ in self.tareas:
+            await self.cola.put(None)
+        await asyncio.gather(*self.tareas)
+        await asyncio.to_thread(self.executor.shutdown, True)
+        self.cola = None
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+CLAVES_POLITICA = {"attempts", "backoff_ms", "max_backoff_ms", "jitter"}
+
+@dataclass(frozen=True)
+class PoliticaReintento:
+    intentos: int = 1
+    espera_ms: int = 500
+    max_espera_ms: int = 10000
+    jitter: float = 0.2
+
+    @classmethod
+    def desde_dict(cls, datos: Optional[dict]) -> Optional["PoliticaReintento"]:
+        """Construye la política desde el bloque "retry" del flow JSON."""
+        if not datos:
+            return None
+        desconocidas = set(datos) - CLAVES_POLITICA
+        if desconocidas:
+            raise ValueError(f"claves de 'retry' desconocidas: {sorted(desconocidas)}")
+        return cls(
+            intentos=max(1, int(datos.get("attempts", 1))),
+            espera_ms=int(datos.get("backoff_ms", cls.espera_ms)),
+            max_espera_ms=int(datos.get("max_backoff_ms", cls.max_espera_ms)),
+            jitter=float(datos.get("jitter", cls.jitter))
+        )
+
+    def espera(self, intento: int) -> float:
+        # Backoff exponencial acotado con jitter proporcional, en segundos
+        base = min(self.max_espera_ms, self.espera_ms * (2 ** (intento - 1)))
+        return max(0.0, base * (1 + random.uniform(-self.jitter, self.jitter))) / 1000
+
+async def ejecutar_con_reintentos(operacion, politica: Optional[PoliticaReintento], descripcion: str, logger=None):
+    logger = logger or logging.getLogger(__name__)
+    intentos = politica.intentos if politica else 1
+    for intento in range(1, intentos + 1):
+        try:
+            return await operacion()
+        except Exception as e:
+            if intento >= intentos:
+                raise
+            espera = politica.espera(intento)
+            logger.warning(f"🔁 {descripcion} falló (intento {intento}/{intentos}): {e}. Reintentando en {espera:.1f}s")
+            await asyncio.sleep(espera)
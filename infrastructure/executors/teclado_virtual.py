@@ -0,0 +1,48 @@
+import logging
+import re
+
+_JS_LEER_TECLAS = "(teclas) => teclas.map(t => (t.innerText || '').trim())"
+
+class TecladoVirtual:
+    """
+    Mapa carácter -> tecla del teclado virtual, leído en una sola evaluación.
+    Cada tecla se presiona con un click real de Playwright sobre el locator
+    filtrado por su texto, que se resuelve al momento del click: un
+    reordenamiento (teclado aleatorio) no puede hacer presionar otra tecla.
+    """
+
+    def __init__(self, page, selector_teclas: str):
+        self.page = page
+        self.selector_teclas = selector_teclas
+        self.logger = logging.getLogger(__name__)
+        self.textos = []
+        self.mapa = {}
+
+    def _indexar(self, textos: list):
+        if textos != self.textos:
+            if self.textos:
+                self.logger.debug("🔀 Teclado virtual reordenado, se reconstruye el mapa.")
+            self.textos = textos
+            self.mapa = {texto: indice for indice, texto in enumerate(textos) if texto}
+
+    async def mapear(self):
+        self._indexar(await self.page.eval_on_selector_all(self.selector_teclas, _JS_LEER_TECLAS))
+        return self.mapa
+
+    async def presionar(self, char: str):
+        if char not in self.mapa:
+            # El mapa solo confirma que la tecla existe; se relee por si el teclado cambió
+            await self.mapear()
+        if char not in self.mapa:
+            self.logger.error(f"❌ No se encontró tecla con valor visible: {char} | Teclas visibles: {self.textos}")
+            raise Exception(f"❌ No se pudo ingresar el carácter: {char}")
+
+        tecla = self.page.locator(self.selector_teclas).filter(has_text=re.compile(rf"^\s*{re.escape(char)}\s*$"))
+        await tecla.first.click()
+
+    async def ingresar(self, texto: str):
+        if not self.mapa:
+            await self.mapear()
+        for posicion, char in enumerate(texto, start=1):
+            await self.presionar(char)
+            self.logger.debug(f"🟢 Tecla {posicion}/{len(texto)} presionada")
@@ -1,38 +1,155 @@
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
 
 # Constantes para la configuración de logging
 LOG_DIR = os.path.join('storage', 'logs')
 SERVER_LOG_PATH = os.path.join(LOG_DIR, 'server.log')
+SERVER_JSON_LOG_PATH = os.path.join(LOG_DIR, 'server.jsonl')
 MAX_LOG_SIZE = 90 * 1024 * 1024  # 90 MB
 BACKUP_COUNT = 3
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-LOG_LEVEL = logging.INFO
+LOG_LEVEL = getattr(logging, os.getenv('LOG_NIVEL', 'INFO').upper(), logging.INFO)
+# texto: server.log | json: server.jsonl | ambos
+LOG_SALIDA = os.getenv('LOG_SALIDA', 'ambos').lower()
+# Fracción de registros DEBUG (eventos por paso) que se conservan
+LOG_MUESTREO_DEBUG = float(os.getenv('LOG_MUESTREO_DEBUG', '0.1'))
+
+# Contexto de los registros: banco en curso y (paso compilado, clave de cuenta) del paso en ejecución
+banco_log = ContextVar('banco_log', default=None)
+paso_log = ContextVar('paso_log', default=None)
+
+_listener = None
 
 class UTF8RotatingFileHandler(RotatingFileHandler):
     def _open(self):
         return open(self.baseFilename, self.mode, encoding='utf-8')
 
-def setup_logging():
-    # Crear el directorio de logs si no existe
-    if not os.path.exists(LOG_DIR):
-        os.makedirs(LOG_DIR)
+class FiltroContexto(logging.Filter):
+    """Agrega banco, fase, cuenta y paso al registro en el hilo/tarea que lo emite."""
+
+    def filter(self, record):
+        record.banco = banco_log.get()
+        paso, cuenta = paso_log.get() or (None, None)
+        record.fase = paso.fase if paso else None
+        record.paso = paso.describir() if paso else None
+        record.cuenta = cuenta
+        return True
+
+class FiltroMuestreo(logging.Filter):
+    def __init__(self, tasa: float):
+        super().__init__()
+        self.tasa = tasa
+
+    def filter(self, record):
+        # Solo se muestrea DEBUG: INFO y superiores se conservan siempre
+        return record.levelno > logging.DEBUG or random.random() < self.tasa
+
+class FormatoJSON(logging.Formatter):
+    def format(self, record):
+        registro = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'banco': getattr(record, 'banco', None),
+            'fase': getattr(record, 'fase', None),
+            'cuenta': getattr(record, 'cuenta', None),
+            'paso': getattr(record, 'paso', None),
+            'pid': record.process,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            registro['exception'] = record.exc_text
+        return json.dumps(registro, ensure_ascii=False)
 
-    # Configuración del logger principal
+def _handlers_archivo() -> list:
+    handlers = []
+    if LOG_SALIDA in ('texto', 'ambos'):
+        handler = UTF8RotatingFileHandler(SERVER_LOG_PATH, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(handler)
+    if LOG_SALIDA in ('json', 'ambos'):
+        handler = UTF8RotatingFileHandler(SERVER_JSON_LOG_PATH, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT)
+        handler.setFormatter(FormatoJSON())
+        handlers.append(handler)
+    for handler in handlers:
+        handler.setLevel(LOG_LEVEL)
+    return handlers
+
+class HandlerCola(QueueHandler):
+    def prepare(self, record):
+        # QueueHandler.prepare mete el traceback en el mensaje y borra exc_info/exc_text;
+        # aquí el traceback se conserva en exc_text para que cada formatter lo ubique
+        excepcion = record.exc_text
+        if record.exc_info and not excepcion:
+            excepcion = logging.Formatter().formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = excepcion
+        return record
+
+def _handler_cola(cola) -> QueueHandler:
+    handler = HandlerCola(cola)
+    handler.addFilter(FiltroContexto())
+    handler.addFilter(FiltroMuestreo(LOG_MUESTREO_DEBUG))
+    return handler
+
+def setup_logging(cola=None):
+    """
+    El event loop solo encola el registro; un QueueListener en segundo plano
+    escribe los archivos. Con `cola` (procesos worker) los registros se envían
+    al proceso coordinador, que es el único que escribe.
+    """
+    global _listener
     logger = logging.getLogger()
     logger.setLevel(LOG_LEVEL)
+    if cola is not None:
+        # En un worker la cola del coordinador manda: si algo al importar ya levantó
+        # un listener local (ej. spawn re-importa __main__), se descarta
+        detener_logging()
+        for handler in [h for h in logger.handlers if isinstance(h, QueueHandler)]:
+            logger.removeHandler(handler)
+        logger.addHandler(_handler_cola(cola))
+        return None
+
+    if _listener or any(isinstance(h, QueueHandler) for h in logger.handlers):
+        return _listener
+
+    # Crear el directorio de logs si no existe
+    os.makedirs(LOG_DIR, exist_ok=True)
 
-    # Configuración del handler para el archivo de logs
-    handler = UTF8RotatingFileHandler(
-        SERVER_LOG_PATH,
-        maxBytes=MAX_LOG_SIZE,
-        backupCount=BACKUP_COUNT
-    )
-    handler.setLevel(LOG_LEVEL)
-    formatter = logging.Formatter(LOG_FORMAT)
-    handler.setFormatter(formatter)
+    cola_local = queue.SimpleQueue()
+    _listener = QueueListener(cola_local, *_handlers_archivo(), respect_handler_level=True)
+    _listener.start()
+    atexit.register(detener_logging)
+    logger.addHandler(_handler_cola(cola_local))
+    return _listener
 
-    # Añadir el handler al logger principal
-    logger.addHandler(handler)
+def escuchar_cola(cola) -> QueueListener:
+    """Listener para la cola compartida con procesos worker; reutiliza los handlers de archivo."""
+    if not _listener:
+        setup_logging()
+    listener = QueueListener(cola, *_listener.handlers, respect_handler_level=True)
+    listener.start()
+    return listener
 
+def detener_logging():
+    global _listener
+    if _listener:
+        # stop() drena la cola antes de terminar
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,98 @@
+import json
+import os
+from contextvars import ContextVar
+from infrastructure.metrics.metricas import METRICAS_DIR, percentil
+from services.manifest_service import _bloqueo
+from utils.config import (
+    TIMEOUT_PERCENTIL,
+    TIMEOUT_FACTOR,
+    TIMEOUT_PISO_MS,
+    TIMEOUT_TECHO_MS,
+    TIMEOUT_MIN_MUESTRAS
+)
+
+# Muestras conservadas por target: las más recientes reflejan el estado actual del portal
+MAX_MUESTRAS = 200
+
+# Historial del banco en curso; None desactiva los timeouts adaptativos
+latencias_actuales = ContextVar("latencias_actuales", default=None)
+
+class HistorialLatencias:
+    """
+    Latencias observadas por (banco, target) persistidas entre ejecuciones.
+    El timeout de cada espera sale de un percentil alto de su historial,
+    acotado entre un piso y un techo; sin historial se usa el timeout fijo.
+    """
+
+    def __init__(self, banco: str, directorio: str = METRICAS_DIR):
+        self.banco = banco.lower()
+        self.ruta = os.path.join(directorio, f"latencias_{self.banco}.json")
+        self.targets = self._cargar()
+        self.nuevas = {}
+        self.modificados = set()
+
+    def _cargar(self) -> dict:
+        if not os.path.exists(self.ruta):
+            return {}
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as file:
+                return json.load(file).get("targets", {})
+        except (OSError, ValueError):
+            return {}
+
+    def timeout(self, target: str, defecto: int) -> int:
+        datos = self.targets.get(target)
+        if not datos or len(datos["muestras"]) < TIMEOUT_MIN_MUESTRAS:
+            return defecto
+        aprendido = min(TIMEOUT_TECHO_MS, max(TIMEOUT_PISO_MS, percentil(datos["muestras"], TIMEOUT_PERCENTIL) * TIMEOUT_FACTOR))
+        vencidos = datos.get("vencidos", 0)
+        if vencidos:
+            # Cada vencimiento consecutivo lo duplica, hasta el timeout fijo: un portal que se volvió
+            # lento se recupera y un selector roto nunca espera más que antes
+            aprendido = min(max(aprendido, defecto), aprendido * 2 ** vencidos)
+        return int(aprendido)
+
+    def observar(self, target: str, duracion_ms: float):
+        datos = self.targets.setdefault(target, {"muestras": [], "vencidos": 0})
+        datos["muestras"] = (datos["muestras"] + [round(duracion_ms, 1)])[-MAX_MUESTRAS:]
+        datos["vencidos"] = 0
+        self.nuevas.setdefault(target, []).append(round(duracion_ms, 1))
+        self.modificados.add(target)
+
+    def vencido(self, target: str):
+        datos = self.targets.setdefault(target, {"muestras": [], "vencidos": 0})
+        datos["vencidos"] = datos.get("vencidos", 0) + 1
+        self.modificados.add(target)
+
+    def guardar(self):
+        if not self.modificados:
+            return None
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        with _bloqueo(self.ruta):
+            # Shards del mismo banco escriben el mismo archivo: se suman las muestras nuevas a lo que haya en disco
+            targets = self._cargar()
+            for target in self.modificados:
+                previo = targets.get(target, {"muestras": []})
+                targets[target] = {
+                    "muestras": (previo["muestras"] + self.nuevas.get(target, []))[-MAX_MUESTRAS:],
+                    "vencidos": self.targets[target].get("vencidos", 0)
+                }
+            self.targets = targets
+            self.nuevas.clear()
+            self.modificados.clear()
+
+            temporal = f"{self.ruta}.{os.getpid()}.tmp"
+            with open(temporal, "w", encoding="utf-8") as file:
+                json.dump({"banco": self.banco, "targets": targets}, file, ensure_ascii=False, indent=2)
+            os.replace(temporal, self.ruta)
+        return self.ruta
+
+    def resumen(self) -> dict:
+        return {
+            target: {
+                "muestras": len(datos["muestras"]),
+                f"p{TIMEOUT_PERCENTIL:g}_ms": round(percentil(datos["muestras"], TIMEOUT_PERCENTIL), 1),
+                "vencidos": datos.get("vencidos", 0)
+            }
+            for target, datos in self.targets.items()
+        }
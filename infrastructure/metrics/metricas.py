@@ -0,0 +1,152 @@
+import json
+import os
+import time
+from contextvars import ContextVar
+from datetime import datetime
+
+METRICAS_DIR = os.getenv("METRICAS_DIR", os.path.join("storage", "metrics"))
+BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 30000, 60000)
+
+# Registro de la ejecución del banco en curso; cada tarea asyncio ve el suyo
+metricas_actuales = ContextVar("metricas_actuales", default=None)
+
+def percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+class Histograma:
+    def __init__(self):
+        self.conteos = [0] * len(BUCKETS_MS)
+        self.valores = []
+
+    def observar(self, valor_ms: float):
+        self.valores.append(valor_ms)
+        for indice, limite in enumerate(BUCKETS_MS):
+            if valor_ms <= limite:
+                self.conteos[indice] += 1
+
+    def resumen(self) -> dict:
+        return {
+            "cantidad": len(self.valores),
+            "total_ms": round(sum(self.valores), 1),
+            "p50_ms": round(percentil(self.valores, 50), 1),
+            "p95_ms": round(percentil(self.valores, 95), 1),
+            "max_ms": round(max(self.valores, default=0.0), 1),
+        }
+
+class RegistroMetricas:
+    """Tiempos por paso (banco, fase, acción, target, cuenta, resultado) y por fase."""
+
+    def __init__(self, banco: str, etiqueta: str = None):
+        self.banco = banco.lower()
+        self.etiqueta = etiqueta
+        self.inicio = datetime.now()
+        self.pasos = []
+        self.histogramas = {}
+        self.resultados = {}
+        self.fases = {}
+
+    def registrar(self, fase: str, accion: str, target: str, cuenta: str, resultado: str, duracion_ms: float):
+        fase = fase or "flow"
+        self.pasos.append({
+            "fase": fase,
+            "accion": accion,
+            "target": target,
+            "cuenta": cuenta,
+            "resultado": resultado,
+            "duracion_ms": round(duracion_ms, 1)
+        })
+        self.histogramas.setdefault((fase, accion, target or ""), Histograma()).observar(duracion_ms)
+        clave_resultado = (fase, accion, resultado)
+        self.resultados[clave_resultado] = self.resultados.get(clave_resultado, 0) + 1
+
+    def _nombre(self) -> str:
+        return f"{self.banco}_{self.etiqueta}" if self.etiqueta else self.banco
+
+    @property
+    def _base(self) -> dict:
+        # Con shard como etiqueta las series de cada archivo .prom no se duplican entre shards
+        return {"banco": self.banco, **({"shard": self.etiqueta} if self.etiqueta else {})}
+
+    def registrar_fase(self, fase: str, duracion_ms: float):
+        self.fases[fase] = self.fases.get(fase, 0.0) + duracion_ms
+
+    def medir_fase(self, fase: str):
+        return _MedicionFase(self, fase)
+
+    def resumen(self) -> dict:
+        por_paso = [
+            {"fase": fase, "accion": accion, "target": target, **histograma.resumen()}
+            for (fase, accion, target), histograma in self.histogramas.items()
+        ]
+        por_paso.sort(key=lambda fila: fila["total_ms"], reverse=True)
+        return {
+            "banco": self.banco,
+            **({"shard": self.etiqueta} if self.etiqueta else {}),
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "fases_ms": {fase: round(ms, 1) for fase, ms in self.fases.items()},
+            "pasos_por_target": por_paso,
+            "mas_lentos": sorted(self.pasos, key=lambda p: p["duracion_ms"], reverse=True)[:10],
+            "pasos": self.pasos,
+        }
+
+    def exportar_json(self, directorio: str = METRICAS_DIR) -> str:
+        os.makedirs(directorio, exist_ok=True)
+        # Shards del mismo banco pueden arrancar en el mismo segundo: la etiqueta evita que se pisen
+        ruta = os.path.join(directorio, f"{self._nombre()}_{self.inicio:%Y%m%d_%H%M%S}.json")
+        with open(ruta, "w", encoding="utf-8") as file:
+            json.dump(self.resumen(), file, ensure_ascii=False, indent=2)
+        return ruta
+
+    def exportar_prometheus(self, directorio: str = METRICAS_DIR) -> str:
+        # Formato textfile del node_exporter; se escribe a un temporal y se renombra
+        lineas = [
+            "# HELP fenix_paso_duracion_ms Duración de los pasos de flow en milisegundos.",
+            "# TYPE fenix_paso_duracion_ms histogram",
+        ]
+        for (fase, accion, target), histograma in sorted(self.histogramas.items()):
+            etiquetas = _etiquetas(**self._base, fase=fase, accion=accion, target=target)
+            for limite, conteo in zip(BUCKETS_MS, histograma.conteos):
+                lineas.append(f'fenix_paso_duracion_ms_bucket{{{etiquetas},le="{limite}"}} {conteo}')
+            lineas.append(f'fenix_paso_duracion_ms_bucket{{{etiquetas},le="+Inf"}} {len(histograma.valores)}')
+            lineas.append(f"fenix_paso_duracion_ms_sum{{{etiquetas}}} {sum(histograma.valores):.1f}")
+            lineas.append(f"fenix_paso_duracion_ms_count{{{etiquetas}}} {len(histograma.valores)}")
+
+        lineas += ["# HELP fenix_pasos_total Pasos ejecutados por resultado.", "# TYPE fenix_pasos_total counter"]
+        for (fase, accion, resultado), total in sorted(self.resultados.items()):
+            etiquetas = _etiquetas(**self._base, fase=fase, accion=accion, resultado=resultado)
+            lineas.append(f"fenix_pasos_total{{{etiquetas}}} {total}")
+
+        lineas += ["# HELP fenix_fase_duracion_ms Duración total por fase.", "# TYPE fenix_fase_duracion_ms gauge"]
+        for fase, ms in sorted(self.fases.items()):
+            lineas.append(f"fenix_fase_duracion_ms{{{_etiquetas(**self._base, fase=fase)}}} {ms:.1f}")
+
+        lineas.append(f"fenix_ultima_ejecucion_timestamp{{{_etiquetas(**self._base)}}} {time.time():.0f}")
+
+        os.makedirs(directorio, exist_ok=True)
+        ruta = os.path.join(directorio, f"fenix_{self._nombre()}.prom")
+        with open(f"{ruta}.tmp", "w", encoding="utf-8") as file:
+            file.write("\n".join(lineas) + "\n")
+        os.replace(f"{ruta}.tmp", ruta)
+        return ruta
+
+class _MedicionFase:
+    def __init__(self, registro: RegistroMetricas, fase: str):
+        self.registro = registro
+        self.fase = fase
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registro.registrar_fase(self.fase, (time.perf_counter() - self.inicio) * 1000)
+        return False
+
+def _etiquetas(**valores) -> str:
+    def escapar(valor):
+        return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return ",".join(f'{clave}="{escapar(valor)}"' for clave, valor in valores.items())
@@ -1,21 +1,57 @@
-from infrastructure.logger.logging_config import setup_logging
-setup_logging()
-
+import argparse
 import asyncio
 import logging
+from datetime import datetime
+from infrastructure.logger.logging_config import setup_logging
 from task.task_manager import TaskManager
+from services.periodo_services import expandir_periodos
+from utils.config import RUTA_AGENDA
 
 logger = logging.getLogger(__name__)
 
 bancos = ["gnb"]
 
-async def main():
+def parsear_argumentos():
+    parser = argparse.ArgumentParser(description="Descarga de extractos bancarios")
+    parser.add_argument("--daemon", action="store_true", help="Ejecuta el scheduler según la agenda")
+    parser.add_argument("--desde", help="Backfill: primer mes a descargar (AAAA-MM)")
+    parser.add_argument("--hasta", help="Backfill: último mes a descargar (AAAA-MM), por defecto igual a --desde")
+    parser.add_argument("--procesos", type=int, nargs="?", const=0, help="Reparte los bancos en procesos worker (0 = núcleos disponibles)")
+    parser.add_argument("bancos", nargs="*", help="Bancos a procesar")
+    return parser.parse_args()
+
+async def main(args):
     logger.info("Iniciando el proceso principal.")
-    task = TaskManager()
-    logger.info(f"Procesando los siguientes bancos: {bancos}")
-    await task.ejecutar_bancos(bancos)
+    if args.procesos is not None:
+        from task.sharding import CoordinadorShards
+        task = CoordinadorShards(procesos=args.procesos)
+    else:
+        task = TaskManager()
+    seleccion = args.bancos or bancos
+
+    periodo = None
+    if args.desde:
+        desde = datetime.strptime(args.desde, "%Y-%m")
+        hasta = datetime.strptime(args.hasta, "%Y-%m") if args.hasta else desde
+        # Todos los meses del rango se descargan dentro de un único login por banco
+        periodo = expandir_periodos(desde, hasta)
+        logger.info(f"Backfill de {len(periodo)} períodos: {args.desde} a {args.hasta or args.desde}")
+
+    logger.info(f"Procesando los siguientes bancos: {seleccion}")
+    await task.ejecutar_bancos(seleccion, periodo=periodo)
     logger.info("Proceso principal finalizado.")
 
+async def main_daemon():
+    from task.scheduler import SchedulerDaemon
+    daemon = SchedulerDaemon.desde_archivo(RUTA_AGENDA)
+    await daemon.ejecutar()
+
 if __name__ == "__main__":
+    # Solo en el proceso principal: los workers spawn re-importan este módulo como __mp_main__
+    setup_logging()
     logger.info("Ejecutando main.py.")
-    asyncio.run(main())
+    args = parsear_argumentos()
+    if args.daemon:
+        asyncio.run(main_daemon())
+    else:
+        asyncio.run(main(args))
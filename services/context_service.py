@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 @dataclass
 class ContextoEjecucion:
@@ -13,6 +13,7 @@ class ContextoEjecucion:
     rutas_por_cuenta: Dict[str, str]
     dia_inicio: str
     dia_fin: str
+    post_descarga: Optional[Any] = None
 
     def to_dict(self):
         return self.__dict__
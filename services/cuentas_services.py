@@ -1,24 +1,73 @@
 import os
-import pandas as pd
+import pickle
+import threading
 from utils.config import RUTA_EXCEL
 
-def obtener_cuentas_por_banco(nombre_banco: str) -> list[dict]:
+CACHE_DIR = os.path.join("storage", "cache")
+CACHE_CUENTAS = os.path.join(CACHE_DIR, "cuentas.pkl")
 
-    if not os.path.exists(RUTA_EXCEL):
-        raise FileNotFoundError(f"❌ El archivo Excel no existe: {RUTA_EXCEL}")
+# Índice en memoria: (firma del Excel, {BANCO: [cuentas]})
+_indice_cuentas = None
+_lock = threading.Lock()
+
+def _firma_excel(ruta: str) -> tuple:
+    stat = os.stat(ruta)
+    return (os.path.abspath(ruta), stat.st_mtime_ns, stat.st_size)
+
+def _leer_excel(ruta: str) -> dict:
+    # pandas solo se necesita cuando el cache binario no sirve
+    import pandas as pd
 
+    df = pd.read_excel(ruta, sheet_name="CUENTAS")
+    df.columns = [str(col).upper().strip() for col in df.columns]
+
+    if "BANCO" not in df.columns:
+        raise ValueError("❌ La hoja 'CUENTAS' debe tener una columna 'BANCO'.")
+
+    df = df[df["BANCO"].notna()].fillna("").infer_objects(copy=False)
+    bancos = df["BANCO"].astype(str).str.upper().str.strip()
+    return {banco: grupo.to_dict("records") for banco, grupo in df.groupby(bancos, sort=False)}
+
+def _leer_cache(firma: tuple):
     try:
-        df = pd.read_excel(RUTA_EXCEL, sheet_name="CUENTAS")
-        df.columns = [col.upper().strip() for col in df.columns]
+        with open(CACHE_CUENTAS, "rb") as file:
+            cache = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    return cache.get("indice") if cache.get("firma") == firma else None
+
+def _guardar_cache(firma: tuple, indice: dict):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    temporal = f"{CACHE_CUENTAS}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as file:
+        pickle.dump({"firma": firma, "indice": indice}, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, CACHE_CUENTAS)
 
-        if "BANCO" not in df.columns:
-            raise ValueError("❌ La hoja 'CUENTAS' debe tener una columna 'BANCO'.")
+def _cargar_indice(ruta: str) -> dict:
+    global _indice_cuentas
+    firma = _firma_excel(ruta)
 
-        filtro = df["BANCO"].str.upper().str.strip() == nombre_banco.upper()
-        
-        df_filtrado = df[filtro].fillna("").infer_objects(copy=False)
-        cuentas = df_filtrado.to_dict("records")
+    with _lock:
+        if _indice_cuentas and _indice_cuentas[0] == firma:
+            return _indice_cuentas[1]
 
+        # El cache binario se invalida si cambia la fecha de modificación o el tamaño del Excel
+        indice = _leer_cache(firma)
+        if indice is None:
+            indice = _leer_excel(ruta)
+            _guardar_cache(firma, indice)
+
+        _indice_cuentas = (firma, indice)
+        return indice
+
+def obtener_cuentas_por_banco(nombre_banco: str) -> list[dict]:
+
+    if not os.path.exists(RUTA_EXCEL):
+        raise FileNotFoundError(f"❌ El archivo Excel no existe: {RUTA_EXCEL}")
+
+    try:
+        indice = _cargar_indice(RUTA_EXCEL)
+        cuentas = [dict(cuenta) for cuenta in indice.get(nombre_banco.upper().strip(), [])]
 
         if not cuentas:
             raise ValueError(f"⚠️ No se encontraron cuentas para el banco: {nombre_banco.upper()}")
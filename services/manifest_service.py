@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+MANIFEST_DIR = os.path.join("storage", "manifests")
+
+def calcular_sha256(ruta: str) -> str:
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as file:
+        for bloque in iter(lambda: file.read(1024 * 1024), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+@contextmanager
+def _bloqueo(ruta: str, espera_max: float = 30.0):
+    # Lock por archivo portable (sin fcntl): varios procesos pueden compartir un manifest
+    bloqueo = f"{ruta}.lock"
+    limite = time.monotonic() + espera_max
+    while True:
+        try:
+            fd = os.open(bloqueo, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if time.monotonic() > limite:
+                # Lock abandonado por un proceso caído
+                try:
+                    os.remove(bloqueo)
+                except OSError:
+                    pass
+                limite = time.monotonic() + espera_max
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(bloqueo)
+
+class ManifestDescargas:
+    """
+    Registro persistente por (banco, período) del estado de cada cuenta,
+    indexado por la clave de generar_clave_cuenta. Permite reanudar una
+    ejecución interrumpida descargando solo lo faltante o fallido.
+    """
+
+    def __init__(self, banco: str, periodo: str):
+        self.banco = banco.lower()
+        self.periodo = periodo
+        self.ruta = os.path.join(MANIFEST_DIR, f"{self.banco}_{periodo}.json")
+        self.entradas = self._cargar()
+        self.modificadas = set()
+
+    def _cargar(self) -> dict:
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as file:
+                return json.load(file).get("cuentas", {})
+        except (OSError, ValueError):
+            return {}
+
+    def guardar(self):
+        os.makedirs(MANIFEST_DIR, exist_ok=True)
+        with _bloqueo(self.ruta):
+            # Otros procesos (shards del mismo banco) pueden haber escrito mientras tanto:
+            # solo se pisan las cuentas que esta instancia modificó
+            entradas = self._cargar()
+            entradas.update({clave: self.entradas[clave] for clave in self.modificadas})
+            self.entradas = entradas
+
+            temporal = f"{self.ruta}.{os.getpid()}.tmp"
+            with open(temporal, "w", encoding="utf-8") as file:
+                json.dump(
+                    {"banco": self.banco, "periodo": self.periodo, "cuentas": self.entradas},
+                    file,
+                    ensure_ascii=False,
+                    indent=2
+                )
+            os.replace(temporal, self.ruta)
+
+    def completada(self, clave: str, ruta_archivo: str) -> bool:
+        entrada = self.entradas.get(clave)
+        if not entrada or entrada.get("estado") != "ok" or entrada.get("ruta") != ruta_archivo:
+            return False
+        if not os.path.exists(ruta_archivo) or os.path.getsize(ruta_archivo) != entrada.get("tamano"):
+            return False
+        return calcular_sha256(ruta_archivo) == entrada.get("sha256")
+
+    def pendientes(self, rutas_por_cuenta: dict) -> set:
+        return {clave for clave, ruta in rutas_por_cuenta.items() if not self.completada(clave, ruta)}
+
+    def registrar_ok(self, clave: str, ruta_archivo: str, sha256: str = None, tamano: int = None):
+        self.modificadas.add(clave)
+        self.entradas[clave] = {
+            "estado": "ok",
+            "ruta": ruta_archivo,
+            "tamano": tamano if tamano is not None else os.path.getsize(ruta_archivo),
+            "sha256": sha256 or calcular_sha256(ruta_archivo),
+            "actualizado": datetime.now().isoformat(timespec="seconds")
+        }
+
+    def registrar_fallo(self, clave: str, ruta_archivo: str, error: str = None):
+        self.modificadas.add(clave)
+        self.entradas[clave] = {
+            "estado": "fallido",
+            "ruta": ruta_archivo,
+            "error": error,
+            "actualizado": datetime.now().isoformat(timespec="seconds")
+        }
+
+    def conciliar(self, rutas_por_cuenta: dict, desde: float, error: str = None, resultados: list = None):
+        # Un archivo escrito durante esta ejecución cuenta como descarga completada, salvo que el
+        # pipeline post-descarga lo haya marcado inválido; su hash se reutiliza en lugar de recalcularlo
+        por_ruta = {os.path.normpath(r["ruta"]): r for r in resultados or []}
+        for clave, ruta in rutas_por_cuenta.items():
+            resultado = por_ruta.get(os.path.normpath(ruta))
+            if resultado and resultado.get("estado") != "ok":
+                self.registrar_fallo(clave, ruta, f"Post-descarga inválida: {resultado.get('error')}")
+            elif os.path.exists(ruta) and os.path.getmtime(ruta) >= desde and os.path.getsize(ruta) > 0:
+                if resultado:
+                    self.registrar_ok(clave, ruta, resultado.get("sha256"), resultado.get("tamano"))
+                else:
+                    self.registrar_ok(clave, ruta)
+            else:
+                self.registrar_fallo(clave, ruta, error or "Archivo no descargado")
+        self.guardar()
@@ -0,0 +1,159 @@
+import glob
+import logging
+import os
+import shutil
+import sys
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime
+import pandas as pd
+from services.ruta_service import generar_clave_cuenta
+
+logger = logging.getLogger(__name__)
+
+ESQUEMA = ["fecha", "descripcion", "debito", "credito", "saldo", "clave_cuenta", "moneda", "banco"]
+DATASET = "extractos.parquet"
+FILAS_ENCABEZADO_MAX = 40
+
+COLUMNAS_BASE = {
+    "fecha": ("FECHA", "FECHA OPERACION", "FECHA MOVIMIENTO", "FEC. MOVIMIENTO", "FECHA VALOR"),
+    "descripcion": ("DESCRIPCION", "CONCEPTO", "DETALLE", "MOVIMIENTO", "REFERENCIA"),
+    "debito": ("DEBITO", "DEBITOS", "DEBE", "RETIROS", "CARGOS"),
+    "credito": ("CREDITO", "CREDITOS", "HABER", "DEPOSITOS", "ABONOS"),
+    "saldo": ("SALDO", "SALDO DISPONIBLE", "SALDO CONTABLE"),
+    "importe": ("IMPORTE", "MONTO"),
+}
+
+@dataclass(frozen=True)
+class PerfilExtracto:
+    # Nombres de encabezado candidatos por columna del esquema (sin tildes, en mayúsculas)
+    columnas: dict = field(default_factory=lambda: dict(COLUMNAS_BASE))
+    separador_decimal: str = ","
+    separador_miles: str = "."
+    dayfirst: bool = True
+
+def _perfil(**columnas_extra) -> PerfilExtracto:
+    columnas = {clave: tuple(valores) for clave, valores in COLUMNAS_BASE.items()}
+    for clave, valores in columnas_extra.items():
+        columnas[clave] = tuple(valores) + columnas.get(clave, ())
+    return PerfilExtracto(columnas=columnas)
+
+PERFILES = {
+    "basa": _perfil(descripcion=("DESCRIPCION DEL MOVIMIENTO",)),
+    "gnb": _perfil(fecha=("FECHA CONTABLE",), descripcion=("DESCRIPCION OPERACION",)),
+    "atlas": _perfil(fecha=("FECHA TRANSACCION",), importe=("MONTO TRANSACCION",)),
+    "continental": _perfil(fecha=("FECHA PROCESO",), descripcion=("GLOSA",)),
+    "itau": _perfil(descripcion=("DESCRIPCION TRANSACCION",)),
+    "sudameris": _perfil(fecha=("FECHA MOV.",)),
+}
+
+def _normalizar_texto(valor) -> str:
+    texto = unicodedata.normalize("NFKD", str(valor)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(texto.upper().split())
+
+def _ubicar_encabezado(crudo: pd.DataFrame, perfil: PerfilExtracto) -> tuple:
+    candidatos = {nombre: clave for clave, nombres in perfil.columnas.items() for nombre in nombres}
+    for fila in range(min(FILAS_ENCABEZADO_MAX, len(crudo))):
+        celdas = [_normalizar_texto(c) for c in crudo.iloc[fila].tolist()]
+        mapeo = {}
+        for posicion, celda in enumerate(celdas):
+            clave = candidatos.get(celda)
+            if clave and clave not in mapeo:
+                mapeo[clave] = posicion
+        if "fecha" in mapeo and len(mapeo) >= 3:
+            return fila, mapeo
+    raise ValueError("No se encontró la fila de encabezado del extracto")
+
+def _a_numero(serie: pd.Series, perfil: PerfilExtracto) -> pd.Series:
+    # Celdas ya numéricas en el Excel se respetan tal cual; solo el texto pasa por los separadores
+    es_numero = serie.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool))
+    numeros = pd.to_numeric(serie.where(es_numero), errors="coerce").astype("Float64")
+
+    texto = serie.where(~es_numero).astype("string").str.strip()
+    negativo = (texto.str.startswith("(") | texto.str.endswith("-")).fillna(False)
+    texto = texto.str.replace(r"[^\d,.\-]", "", regex=True)
+    if perfil.separador_miles:
+        texto = texto.str.replace(perfil.separador_miles, "", regex=False)
+    if perfil.separador_decimal != ".":
+        texto = texto.str.replace(perfil.separador_decimal, ".", regex=False)
+    desde_texto = pd.to_numeric(texto.str.rstrip("-"), errors="coerce").astype("Float64")
+    desde_texto = desde_texto.where(~negativo, -desde_texto.abs())
+    return numeros.combine_first(desde_texto)
+
+def _datos_archivo(ruta: str) -> dict:
+    partes = os.path.splitext(os.path.basename(ruta))[0].split("_")
+    tipo, nro, moneda = "_".join(partes[1:-2]), partes[-2], partes[-1]
+    return {
+        "clave_cuenta": generar_clave_cuenta({"NROCUENTA": nro, "TIPOCUENTA": tipo, "MONEDA": moneda}),
+        "moneda": moneda.upper()
+    }
+
+def _leer_extracto(ruta: str, perfil: PerfilExtracto) -> pd.DataFrame:
+    crudo = pd.read_excel(ruta, header=None, dtype=object)
+    fila, mapeo = _ubicar_encabezado(crudo, perfil)
+    datos = crudo.iloc[fila + 1:, list(mapeo.values())]
+    datos.columns = list(mapeo.keys())
+    for clave, valor in _datos_archivo(ruta).items():
+        datos = datos.assign(**{clave: valor})
+    return datos
+
+def normalizar_banco(banco: str, archivos: list) -> tuple:
+    perfil = PERFILES.get(banco.lower(), PerfilExtracto())
+    marcos, errores = [], []
+    for ruta in archivos:
+        try:
+            marcos.append(_leer_extracto(ruta, perfil))
+        except Exception as e:
+            errores.append({"ruta": ruta, "error": str(e)})
+            logger.warning(f"⚠️ No se pudo normalizar {ruta}: {e}")
+
+    if not marcos:
+        return pd.DataFrame(columns=ESQUEMA), errores
+
+    # Las conversiones se aplican una sola vez sobre todas las filas del banco
+    df = pd.concat(marcos, ignore_index=True)
+    for columna in ("descripcion", "debito", "credito", "saldo", "importe"):
+        if columna not in df.columns:
+            df[columna] = pd.NA
+
+    df["fecha"] = pd.to_datetime(df["fecha"], dayfirst=perfil.dayfirst, errors="coerce")
+    df = df[df["fecha"].notna()]
+
+    importe = _a_numero(df["importe"], perfil)
+    df["debito"] = _a_numero(df["debito"], perfil).abs().fillna(importe.where(importe < 0).abs())
+    df["credito"] = _a_numero(df["credito"], perfil).abs().fillna(importe.where(importe > 0))
+    df["saldo"] = _a_numero(df["saldo"], perfil)
+    df["descripcion"] = df["descripcion"].astype("string").str.strip()
+    df["banco"] = banco.lower()
+
+    return df[ESQUEMA].reset_index(drop=True), errores
+
+def normalizar_periodo(base_dir: str, fecha: datetime, bancos: list = None) -> dict:
+    ruta_mes = os.path.join(base_dir, fecha.strftime("%Y"), fecha.strftime("%m"))
+    ruta_dataset = os.path.join(ruta_mes, DATASET)
+    carpetas = bancos or [os.path.basename(c) for c in glob.glob(os.path.join(ruta_mes, "*")) if os.path.isdir(c) and c != ruta_dataset]
+
+    resumen = {}
+    for banco in carpetas:
+        archivos = [
+            ruta for ruta in glob.glob(os.path.join(ruta_mes, banco.upper(), "EXTRACTO_*.xlsx"))
+            if ".original." not in ruta
+        ]
+        df, errores = normalizar_banco(banco, archivos)
+
+        # Se reemplaza solo la partición del banco procesado
+        particion = os.path.join(ruta_dataset, f"banco={banco.lower()}")
+        shutil.rmtree(particion, ignore_errors=True)
+        if not df.empty:
+            df.to_parquet(ruta_dataset, partition_cols=["banco"], index=False)
+
+        resumen[banco.lower()] = {"archivos": len(archivos), "filas": len(df), "errores": errores}
+        logger.info(f"🧮 {banco.upper()}: {len(df)} movimientos normalizados de {len(archivos)} extractos.")
+
+    return resumen
+
+if __name__ == "__main__":
+    # Uso: python -m services.normalizador_service AAAA-MM [banco ...]
+    from utils.config import BASE_DIR
+    periodo = datetime.strptime(sys.argv[1], "%Y-%m")
+    print(normalizar_periodo(BASE_DIR, periodo, sys.argv[2:] or None))
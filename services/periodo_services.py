@@ -6,30 +6,51 @@ MESES_ES = [
     "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
 ]
 
-def generar_periodo():
-    hoy = datetime.today()
-    periodo = os.getenv("PERIODO_DESCARGA", "MENSUAL").upper()
-    quincena = os.getenv("QUINCENA", "1")
+def _ultimo_dia(fecha: datetime) -> int:
+    siguiente_mes = fecha.replace(day=28) + timedelta(days=4)
+    return (siguiente_mes - timedelta(days=siguiente_mes.day)).day
+
+def _nombre_mes(fecha: datetime) -> str:
+    return f"{MESES_ES[fecha.month - 1]} {fecha.year}"
+
+def periodo_mensual(anio: int, mes: int):
+    fecha_inicio = datetime(anio, mes, 1)
+    fecha_fin = fecha_inicio.replace(day=_ultimo_dia(fecha_inicio))
+    return fecha_inicio, fecha_fin, _nombre_mes(fecha_fin)
+
+def periodo_quincenal(anio: int, mes: int, quincena: str):
+    fecha_base = datetime(anio, mes, 1)
+    if str(quincena) == "1":
+        fecha_inicio = fecha_base
+        fecha_fin = fecha_base.replace(day=15)
+    else:
+        fecha_inicio = fecha_base.replace(day=16)
+        fecha_fin = fecha_base.replace(day=_ultimo_dia(fecha_base))
+    return fecha_inicio, fecha_fin, _nombre_mes(fecha_fin)
+
+def generar_periodo(hoy: datetime = None, periodo: str = None, quincena: str = None):
+    hoy = hoy or datetime.today()
+    periodo = (periodo or os.getenv("PERIODO_DESCARGA", "MENSUAL")).upper()
+    quincena = quincena or os.getenv("QUINCENA", "1")
 
     primer_dia_mes_actual = hoy.replace(day=1)
     ultimo_dia_mes_anterior = primer_dia_mes_actual - timedelta(days=1)
-    fecha_base = ultimo_dia_mes_anterior.replace(day=1)
 
     if periodo == "QUINCENAL":
-        if quincena == "1":
-            fecha_inicio = fecha_base
-            fecha_fin = fecha_base.replace(day=15)
-        else:
-            fecha_inicio = fecha_base.replace(day=16)
-            siguiente_mes = fecha_base.replace(day=28) + timedelta(days=4)
-            ultimo_dia = (siguiente_mes - timedelta(days=siguiente_mes.day)).day
-            fecha_fin = fecha_base.replace(day=ultimo_dia)
-    else:
-        fecha_inicio = fecha_base
-        siguiente_mes = fecha_base.replace(day=28) + timedelta(days=4)
-        fecha_fin = siguiente_mes - timedelta(days=siguiente_mes.day)
-        # Solo en mensual ajustamos al último día real
-        fecha_fin = fecha_fin.replace(day=ultimo_dia_mes_anterior.day)
+        return periodo_quincenal(ultimo_dia_mes_anterior.year, ultimo_dia_mes_anterior.month, quincena)
+    return periodo_mensual(ultimo_dia_mes_anterior.year, ultimo_dia_mes_anterior.month)
+
+def expandir_periodos(desde: datetime, hasta: datetime) -> list:
+    """
+    Meses completos entre `desde` y `hasta` (inclusive), en orden cronológico.
+    Los quincenales no se expanden: ambas quincenas comparten la ruta del mes.
+    """
+    if desde > hasta:
+        raise ValueError(f"❌ Rango de períodos inválido: {desde:%Y-%m} > {hasta:%Y-%m}")
 
-    nombre_mes = f"{MESES_ES[fecha_fin.month - 1]} {fecha_fin.year}"
-    return fecha_inicio, fecha_fin, nombre_mes
+    periodos = []
+    anio, mes = desde.year, desde.month
+    while (anio, mes) <= (hasta.year, hasta.month):
+        periodos.append(periodo_mensual(anio, mes))
+        anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+    return periodos
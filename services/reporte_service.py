@@ -0,0 +1,37 @@
+import json
+import os
+from datetime import datetime
+
+REPORTES_DIR = os.path.join("storage", "reports")
+
+class ReporteEjecucion:
+    """Reporte JSON de una ejecución por banco, armado por secciones."""
+
+    def __init__(self, banco: str, etiqueta: str = None):
+        self.banco = banco.lower()
+        self.etiqueta = etiqueta
+        self.inicio = datetime.now()
+        self.secciones = {}
+
+    def agregar(self, seccion: str, datos):
+        self.secciones.setdefault(seccion, []).append(datos)
+
+    def definir(self, seccion: str, valor):
+        self.secciones[seccion] = valor
+
+    def to_dict(self) -> dict:
+        return {
+            "banco": self.banco,
+            **({"shard": self.etiqueta} if self.etiqueta else {}),
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "fin": datetime.now().isoformat(timespec="seconds"),
+            **self.secciones
+        }
+
+    def guardar(self) -> str:
+        os.makedirs(REPORTES_DIR, exist_ok=True)
+        nombre = f"{self.banco}_{self.etiqueta}" if self.etiqueta else self.banco
+        ruta = os.path.join(REPORTES_DIR, f"{nombre}_{self.inicio:%Y%m%d_%H%M%S}.json")
+        with open(ruta, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2, default=str)
+        return ruta
@@ -15,7 +15,8 @@ def generar_ruta_archivo(
     tipo_cuenta: str,
     nro_cuenta: str,
     tipo_moneda: str,
-    fecha: datetime = None  # ✅ Volver a incluir este argumento
+    fecha: datetime = None,  # ✅ Volver a incluir este argumento
+    crear_directorio: bool = True
 ) -> str:
     """
     Genera la ruta en base al mes anterior al actual si no se pasa fecha.
@@ -27,7 +28,8 @@ def generar_ruta_archivo(
     mes = fecha.strftime("%m")
 
     ruta_banco = os.path.join(base_dir, anio, mes, str(banco).strip().upper())
-    os.makedirs(ruta_banco, exist_ok=True)
+    if crear_directorio:
+        os.makedirs(ruta_banco, exist_ok=True)
 
     tipo_archivo = str(tipo_archivo).strip().upper()
     tipo_cuenta = str(tipo_cuenta).strip().upper()
@@ -38,3 +40,8 @@ def generar_ruta_archivo(
     ruta_completa = os.path.join(ruta_banco, nombre_archivo)
 
     return ruta_completa
+
+def crear_directorios(rutas_archivo) -> None:
+    # Una sola creación por carpeta distinta, no una por cuenta
+    for carpeta in {os.path.dirname(ruta) for ruta in rutas_archivo}:
+        os.makedirs(carpeta, exist_ok=True)
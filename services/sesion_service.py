@@ -0,0 +1,36 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+COOKIE_DIR = os.path.join("storage", "cookies")
+
+def ruta_sesion(banco: str) -> str:
+    return os.path.join(COOKIE_DIR, f"{banco.lower()}.json")
+
+def _ruta_metadata(banco: str) -> str:
+    return os.path.join(COOKIE_DIR, f"{banco.lower()}.meta.json")
+
+def registrar_sesion(banco: str):
+    os.makedirs(COOKIE_DIR, exist_ok=True)
+    with open(_ruta_metadata(banco), "w", encoding="utf-8") as file:
+        json.dump({"guardada": datetime.now().isoformat()}, file)
+
+def sesion_vigente(banco: str, ttl_minutos: int = None) -> bool:
+    if not os.path.exists(ruta_sesion(banco)):
+        return False
+    if not ttl_minutos:
+        return True
+
+    try:
+        with open(_ruta_metadata(banco), "r", encoding="utf-8") as file:
+            guardada = datetime.fromisoformat(json.load(file)["guardada"])
+    except (OSError, ValueError, KeyError):
+        # Sin metadata no podemos saber la antigüedad: se considera vencida
+        return False
+
+    return datetime.now() - guardada < timedelta(minutes=ttl_minutos)
+
+def invalidar_sesion(banco: str):
+    for ruta in (ruta_sesion(banco), _ruta_metadata(banco)):
+        if os.path.exists(ruta):
+            os.remove(ruta)
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from typing import Optional
+from infrastructure.browser.browser_pool import BrowserPool
+from services.periodo_services import generar_periodo
+from task.task_manager import TaskManager
+from utils.config import (
+    DAEMON_PUERTO,
+    MAX_BANCOS_CONCURRENTES,
+    NAVEGADORES_POOL,
+    RECICLAR_NAVEGADOR_CADA
+)
+
+INTERVALO_REVISION_SEG = 30
+# QUINCENAL queda fuera: ambas quincenas escriben la misma ruta del mes y la segunda pisaría a la primera
+PERIODOS_AGENDA = ("MENSUAL",)
+
+@dataclass
+class TrabajoBanco:
+    banco: str
+    periodo: str = "MENSUAL"
+    dia: int = 1
+    hora: str = "06:00"
+    ventana_horas: float = 12
+    reintento_minutos: int = 30
+    ultimo_ok: Optional[str] = None
+    ultimo_error: Optional[str] = None
+    proximo_intento: Optional[datetime] = None
+    en_curso: bool = field(default=False)
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "TrabajoBanco":
+        reintento = datos.get("reintento", {})
+        periodo = datos.get("periodo", "MENSUAL").upper()
+        if periodo not in PERIODOS_AGENDA:
+            raise ValueError(f"❌ Período '{periodo}' no soportado en la agenda ({datos['banco']}): usar {', '.join(PERIODOS_AGENDA)}")
+        return cls(
+            banco=datos["banco"].lower(),
+            periodo=periodo,
+            dia=int(datos.get("dia", 1)),
+            hora=datos.get("hora", "06:00"),
+            ventana_horas=float(reintento.get("ventana_horas", 12)),
+            reintento_minutos=int(reintento.get("cada_minutos", 30))
+        )
+
+    def _en_hora(self, fecha: datetime) -> datetime:
+        hora, minuto = (int(parte) for parte in self.hora.split(":"))
+        return fecha.replace(hour=hora, minute=minuto, second=0, microsecond=0)
+
+    def ultima_programacion(self, ahora: datetime) -> tuple:
+        """
+        Último disparo programado <= ahora y el período que le corresponde.
+        MENSUAL: el día `dia` de cada mes, descarga el mes anterior.
+        """
+        disparo = self._en_hora(ahora.replace(day=min(self.dia, 28)))
+        if disparo > ahora:
+            mes_anterior = ahora.replace(day=1) - timedelta(days=1)
+            disparo = self._en_hora(mes_anterior.replace(day=min(self.dia, 28)))
+        return disparo, generar_periodo(hoy=disparo, periodo="MENSUAL")
+
+class SchedulerDaemon:
+    """
+    Proceso de larga duración: mantiene el pool de navegadores caliente y la
+    configuración cargada, dispara los trabajos según su calendario y reintenta
+    dentro de la ventana configurada. Expone un endpoint HTTP local de control.
+    """
+
+    def __init__(self, trabajos: list, host: str = "127.0.0.1", puerto: int = DAEMON_PUERTO):
+        self.logger = logging.getLogger(__name__)
+        self.trabajos = {trabajo.banco: trabajo for trabajo in trabajos}
+        self.host = host
+        self.puerto = puerto
+        self.historial = deque(maxlen=50)
+        self.semaforo = asyncio.Semaphore(max(1, MAX_BANCOS_CONCURRENTES))
+        self.pool = BrowserPool(
+            headless=False,
+            max_navegadores=NAVEGADORES_POOL,
+            reciclar_despues_de=RECICLAR_NAVEGADOR_CADA
+        )
+        self.task_manager = TaskManager(pool=self.pool)
+        self.tareas = set()
+
+    @classmethod
+    def desde_archivo(cls, ruta: str, **opciones) -> "SchedulerDaemon":
+        with open(ruta, "r", encoding="utf-8") as file:
+            agenda = json.load(file)
+        return cls([TrabajoBanco.desde_dict(t) for t in agenda.get("trabajos", [])], **opciones)
+
+    def _clave(self, periodo: tuple) -> str:
+        fecha_inicio, fecha_fin, _ = periodo
+        return f"{fecha_inicio:%Y-%m-%d}_{fecha_fin:%Y-%m-%d}"
+
+    def revisar(self, ahora: datetime = None):
+        ahora = ahora or datetime.now()
+        for trabajo in self.trabajos.values():
+            if trabajo.en_curso:
+                continue
+            disparo, periodo = trabajo.ultima_programacion(ahora)
+            if trabajo.ultimo_ok == self._clave(periodo):
+                continue
+            if ahora - disparo > timedelta(hours=trabajo.ventana_horas):
+                continue
+            if trabajo.proximo_intento and trabajo.proximo_intento > ahora:
+                continue
+            self.lanzar(trabajo, periodo, "agenda")
+
+    def lanzar(self, trabajo: TrabajoBanco, periodo: tuple, origen: str):
+        trabajo.en_curso = True
+        tarea = asyncio.create_task(self._ejecutar_trabajo(trabajo, periodo, origen), name=f"job-{trabajo.banco}")
+        self.tareas.add(tarea)
+        tarea.add_done_callback(self.tareas.discard)
+
+    async def _ejecutar_trabajo(self, trabajo: TrabajoBanco, periodo: tuple, origen: str):
+        clave = self._clave(periodo)
+        self.logger.info(f"⏰ Trabajo {trabajo.banco.upper()} ({origen}) para el período {clave}")
+        try:
+            async with self.semaforo:
+                resultados = await self.task_manager.ejecutar_bancos([trabajo.banco], concurrente=False, periodo=periodo)
+            resultado = resultados[trabajo.banco]
+        except Exception as e:
+            self.logger.exception(f"❌ Trabajo {trabajo.banco.upper()} falló: {e}")
+            resultado = None
+            trabajo.ultimo_error = str(e)
+        finally:
+            trabajo.en_curso = False
+
+        if resultado and resultado.exito:
+            trabajo.ultimo_ok = clave
+            trabajo.ultimo_error = None
+            trabajo.proximo_intento = None
+        else:
+            if resultado:
+                trabajo.ultimo_error = resultado.error
+            trabajo.proximo_intento = datetime.now() + timedelta(minutes=trabajo.reintento_minutos)
+
+        self.historial.append({
+            "banco": trabajo.banco,
+            "periodo": clave,
+            "origen": origen,
+            "fin": datetime.now().isoformat(timespec="seconds"),
+            "resultado": asdict(resultado) if resultado else {"exito": False, "error": trabajo.ultimo_error}
+        })
+
+    def estado(self) -> dict:
+        return {
+            "trabajos": {
+                banco: {**asdict(t), "proximo_intento": t.proximo_intento.isoformat(timespec="seconds") if t.proximo_intento else None}
+                for banco, t in self.trabajos.items()
+            },
+            "navegadores": len(self.pool.navegadores),
+            "historial": list(self.historial)
+        }
+
+    async def _atender(self, reader, writer):
+        try:
+            linea = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            metodo, ruta = (linea + ["", ""])[:2]
+            codigo, cuerpo = self._rutear(metodo.upper(), ruta)
+        except Exception as e:
+            codigo, cuerpo = 500, {"error": str(e)}
+
+        datos = json.dumps(cuerpo, ensure_ascii=False, default=str).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {codigo} {HTTPStatus(codigo).phrase}\r\nContent-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(datos)}\r\nConnection: close\r\n\r\n".encode("latin-1") + datos
+        )
+        await writer.drain()
+        writer.close()
+
+    def _rutear(self, metodo: str, ruta: str) -> tuple:
+        partes = [parte for parte in ruta.split("?")[0].split("/") if parte]
+        if metodo == "GET" and partes == ["estado"]:
+            return 200, self.estado()
+        if metodo == "GET" and partes == ["ejecuciones"]:
+            return 200, list(self.historial)
+        if metodo == "POST" and len(partes) == 2 and partes[0] == "ejecutar":
+            trabajo = self.trabajos.get(partes[1].lower())
+            if not trabajo:
+                return 404, {"error": f"Banco sin trabajo configurado: {partes[1]}"}
+            if trabajo.en_curso:
+                return 409, {"error": "El trabajo ya está en curso"}
+            _, periodo = trabajo.ultima_programacion(datetime.now())
+            self.lanzar(trabajo, periodo, "manual")
+            return 202, {"lanzado": trabajo.banco, "periodo": self._clave(periodo)}
+        return 404, {"error": "Rutas: GET /estado, GET /ejecuciones, POST /ejecutar/<banco>"}
+
+    async def ejecutar(self):
+        await self.pool.iniciar()
+        servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        self.logger.info(f"🛰️ Daemon activo con {len(self.trabajos)} trabajos. Control en http://{self.host}:{self.puerto}")
+        try:
+            while True:
+                self.revisar()
+                await asyncio.sleep(INTERVALO_REVISION_SEG)
+        finally:
+            servidor.close()
+            await servidor.wait_closed()
+            for tarea in list(self.tareas):
+                tarea.cancel()
+            await asyncio.gather(*self.tareas, return_exceptions=True)
+            await self.pool.cerrar()
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional
+from infrastructure.browser.browser_pool import BrowserPool
+from infrastructure.executors.bank_processor import BankProcessor
+from infrastructure.logger.logging_config import escuchar_cola, setup_logging
+from services.cuentas_services import obtener_cuentas_por_banco
+from services.reporte_service import REPORTES_DIR
+from services.ruta_service import generar_clave_cuenta
+from task.task_manager import ResultadoBanco
+from utils.config import CUENTAS_POR_SHARD, RECICLAR_NAVEGADOR_CADA, SHARD_PROCESOS
+
+@dataclass(frozen=True)
+class Shard:
+    banco: str
+    indice: int
+    total: int
+    claves: Optional[tuple] = None  # None: todas las cuentas del banco
+
+    @property
+    def etiqueta(self) -> Optional[str]:
+        return f"s{self.indice + 1}de{self.total}" if self.total > 1 else None
+
+def planificar_shards(bancos: list, cuentas_por_shard: int = CUENTAS_POR_SHARD) -> list:
+    """
+    Un shard por banco, o lotes de `cuentas_por_shard` cuentas si es > 0.
+    Partir un banco implica sesiones simultáneas con las mismas credenciales:
+    solo conviene en portales que lo permiten.
+    """
+    shards = []
+    for banco in bancos:
+        if cuentas_por_shard <= 0:
+            shards.append(Shard(banco.lower(), 0, 1))
+            continue
+        claves = [generar_clave_cuenta(cuenta) for cuenta in obtener_cuentas_por_banco(banco)]
+        lotes = [tuple(claves[i:i + cuentas_por_shard]) for i in range(0, len(claves), cuentas_por_shard)]
+        shards.extend(Shard(banco.lower(), indice, len(lotes), lote) for indice, lote in enumerate(lotes))
+    return shards
+
+def ejecutar_shard(shard: Shard, periodo=None, cola_log=None) -> tuple:
+    # Punto de entrada del proceso worker: event loop y navegador propios; los logs van al coordinador
+    setup_logging(cola_log)
+    return asyncio.run(_procesar_shard(shard, periodo))
+
+async def _procesar_shard(shard: Shard, periodo) -> tuple:
+    logger = logging.getLogger(__name__)
+    inicio = time.perf_counter()
+    pool = BrowserPool(headless=False, max_navegadores=1, reciclar_despues_de=RECICLAR_NAVEGADOR_CADA)
+    ruta_reporte = None
+    try:
+        processor = BankProcessor(
+            shard.banco,
+            pool=pool,
+            periodo=periodo,
+            claves_cuentas=shard.claves,
+            etiqueta=shard.etiqueta
+        )
+        exito = await processor.ejecutar()
+        error = str(processor.error) if processor.error else None
+        ruta_reporte = processor.ruta_reporte
+    except Exception as e:
+        logger.exception(f"❌ Error en shard {shard.banco.upper()} {shard.etiqueta or ''}: {e}")
+        exito, error = False, str(e)
+    finally:
+        await pool.cerrar()
+
+    return ResultadoBanco(shard.banco, bool(exito), time.perf_counter() - inicio, error), ruta_reporte
+
+class CoordinadorShards:
+    def __init__(self, procesos: int = None, cuentas_por_shard: int = None):
+        self.logger = logging.getLogger(__name__)
+        self.procesos = max(1, procesos or SHARD_PROCESOS or os.cpu_count() or 1)
+        self.cuentas_por_shard = CUENTAS_POR_SHARD if cuentas_por_shard is None else cuentas_por_shard
+
+    async def ejecutar_bancos(self, bancos: list, periodo=None) -> dict:
+        inicio = datetime.now()
+        shards = await asyncio.to_thread(planificar_shards, bancos, self.cuentas_por_shard)
+        procesos = min(self.procesos, len(shards)) or 1
+        self.logger.info(f"🧩 {len(shards)} shards de {len(bancos)} bancos en {procesos} procesos.")
+
+        loop = asyncio.get_running_loop()
+        # spawn: un fork con hilos de Playwright/asyncio vivos no es seguro
+        contexto_mp = multiprocessing.get_context("spawn")
+        # Un único escritor de logs: los workers encolan y el coordinador escribe
+        with contexto_mp.Manager() as manager:
+            cola_log = manager.Queue()
+            listener = escuchar_cola(cola_log)
+            try:
+                with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto_mp) as executor:
+                    finalizados = await asyncio.gather(
+                        *(loop.run_in_executor(executor, ejecutar_shard, shard, periodo, cola_log) for shard in shards),
+                        return_exceptions=True
+                    )
+            finally:
+                listener.stop()
+
+        salidas = []
+        for shard, salida in zip(shards, finalizados):
+            # Un worker caído (p. ej. BrokenProcessPool) solo afecta a su shard
+            if isinstance(salida, BaseException):
+                salida = (ResultadoBanco(shard.banco, False, 0.0, str(salida)), None)
+            salidas.append((shard, *salida))
+
+        resultados = self._fusionar_resultados(salidas)
+        ruta = await asyncio.to_thread(self._guardar_reporte, inicio, procesos, salidas, resultados)
+        for banco, resultado in resultados.items():
+            estado = "✅" if resultado.exito else "❌"
+            detalle = f" | {resultado.error}" if resultado.error else ""
+            self.logger.info(f"{estado} {banco.upper()}: {resultado.duracion:.1f}s{detalle}")
+        self.logger.info(f"📄 Reporte consolidado: {ruta}")
+        return resultados
+
+    @staticmethod
+    def _fusionar_resultados(salidas: list) -> dict:
+        resultados = {}
+        for shard, resultado, _ in salidas:
+            previo = resultados.get(shard.banco)
+            if previo is None:
+                resultados[shard.banco] = resultado
+                continue
+            errores = [e for e in (previo.error, resultado.error) if e]
+            resultados[shard.banco] = ResultadoBanco(
+                shard.banco,
+                previo.exito and resultado.exito,
+                max(previo.duracion, resultado.duracion),
+                " | ".join(errores) or None
+            )
+        return resultados
+
+    @staticmethod
+    def _guardar_reporte(inicio: datetime, procesos: int, salidas: list, resultados: dict) -> str:
+        detalle = []
+        for shard, resultado, ruta_reporte in salidas:
+            reporte = None
+            if ruta_reporte:
+                try:
+                    with open(ruta_reporte, "r", encoding="utf-8") as file:
+                        reporte = json.load(file)
+                except (OSError, ValueError):
+                    pass
+            detalle.append({
+                "shard": shard.etiqueta,
+                "cuentas": len(shard.claves) if shard.claves is not None else None,
+                **asdict(resultado),
+                "reporte": reporte
+            })
+
+        os.makedirs(REPORTES_DIR, exist_ok=True)
+        ruta = os.path.join(REPORTES_DIR, f"ejecucion_{inicio:%Y%m%d_%H%M%S}.json")
+        with open(ruta, "w", encoding="utf-8") as file:
+            json.dump({
+                "inicio": inicio.isoformat(timespec="seconds"),
+                "fin": datetime.now().isoformat(timespec="seconds"),
+                "procesos": procesos,
+                "bancos": {banco: asdict(resultado) for banco, resultado in resultados.items()},
+                "shards": detalle
+            }, file, ensure_ascii=False, indent=2, default=str)
+        return ruta
@@ -1,8 +1,100 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+from infrastructure.browser.browser_pool import BrowserPool
 from infrastructure.executors.bank_processor import BankProcessor
+from utils.config import (
+    EJECUCION_CONCURRENTE,
+    MAX_BANCOS_CONCURRENTES,
+    NAVEGADORES_POOL,
+    RECICLAR_NAVEGADOR_CADA
+)
+
+@dataclass
+class ResultadoBanco:
+    banco: str
+    exito: bool
+    duracion: float
+    error: Optional[str] = None
 
 class TaskManager:
-    async def ejecutar_bancos(self, bancos: list):
+    def __init__(self, max_concurrencia: int = None, pool: BrowserPool = None):
+        self.logger = logging.getLogger(__name__)
+        self.max_concurrencia = max(1, max_concurrencia or MAX_BANCOS_CONCURRENTES)
+        self.pool = pool
+
+    async def ejecutar_bancos(self, bancos: list, concurrente: bool = None, periodo=None):
+        # periodo: tupla (fecha_inicio, fecha_fin, mes) o lista de ellas para backfill
+        if concurrente is None:
+            concurrente = EJECUCION_CONCURRENTE
+
+        # Un pool propio solo vive lo que dura esta ejecución; uno externo se respeta
+        pool_propio = self.pool is None
+        if pool_propio:
+            self.pool = BrowserPool(
+                headless=False,
+                max_navegadores=NAVEGADORES_POOL,
+                reciclar_despues_de=RECICLAR_NAVEGADOR_CADA
+            )
+
+        try:
+            if concurrente:
+                return await self.ejecutar_bancos_concurrente(bancos, periodo)
+            return await self._ejecutar_bancos_secuencial(bancos, periodo)
+        finally:
+            if pool_propio:
+                await self.pool.cerrar()
+                self.pool = None
+
+    async def _ejecutar_bancos_secuencial(self, bancos: list, periodo: tuple = None):
+        resultados = {}
         for nombre_banco in bancos:
-            print(f"🚀 Procesando banco: {nombre_banco.upper()}")
-            processor = BankProcessor(nombre_banco)
-            await processor.ejecutar()
+            self.logger.info(f"🚀 Procesando banco: {nombre_banco.upper()}")
+            resultados[nombre_banco] = await self._procesar_banco(nombre_banco, periodo)
+        self._resumir(resultados)
+        return resultados
+
+    async def ejecutar_bancos_concurrente(self, bancos: list, periodo: tuple = None):
+        semaforo = asyncio.Semaphore(self.max_concurrencia)
+        self.logger.info(f"⚡ Ejecución concurrente de {len(bancos)} bancos (máximo {self.max_concurrencia} en paralelo).")
+
+        async def procesar_con_limite(nombre_banco):
+            async with semaforo:
+                return await self._procesar_banco(nombre_banco, periodo)
+
+        tareas = [
+            asyncio.create_task(procesar_con_limite(nombre_banco), name=f"banco-{nombre_banco}")
+            for nombre_banco in bancos
+        ]
+        finalizados = await asyncio.gather(*tareas, return_exceptions=True)
+
+        resultados = {}
+        for nombre_banco, resultado in zip(bancos, finalizados):
+            # Un fallo inesperado en un banco no debe cancelar al resto
+            if isinstance(resultado, BaseException):
+                resultado = ResultadoBanco(nombre_banco, False, 0.0, str(resultado))
+            resultados[nombre_banco] = resultado
+
+        self._resumir(resultados)
+        return resultados
+
+    async def _procesar_banco(self, nombre_banco: str, periodo: tuple = None) -> ResultadoBanco:
+        inicio = time.perf_counter()
+        try:
+            # La carga de cuentas y configuración es bloqueante: se hace fuera del event loop
+            processor = await asyncio.to_thread(BankProcessor, nombre_banco, pool=self.pool, periodo=periodo)
+            exito = await processor.ejecutar()
+            error = str(processor.error) if processor.error else None
+        except Exception as e:
+            self.logger.exception(f"❌ Error preparando el banco {nombre_banco.upper()}: {e}")
+            exito, error = False, str(e)
+
+        return ResultadoBanco(nombre_banco, bool(exito), time.perf_counter() - inicio, error)
+
+    def _resumir(self, resultados: dict):
+        for nombre_banco, resultado in resultados.items():
+            estado = "✅" if resultado.exito else "❌"
+            detalle = f" | {resultado.error}" if resultado.error else ""
+            self.logger.info(f"{estado} {nombre_banco.upper()}: {resultado.duracion:.1f}s{detalle}")
@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 import json
+from functools import lru_cache
 
 
 # Cargar variables de entorno desde el archivo .env
@@ -13,6 +14,42 @@ QUINCENA = os.getenv("QUINCENA")
 RUTA_EXCEL = os.getenv("RUTA_EXCEL")
 BASE_DIR = os.getenv("BASE_DIR")
 
+# Ejecución concurrente de bancos
+EJECUCION_CONCURRENTE = os.getenv("EJECUCION_CONCURRENTE", "false").lower() in ("1", "true", "si")
+MAX_BANCOS_CONCURRENTES = int(os.getenv("MAX_BANCOS_CONCURRENTES", "3"))
+
+# Pool de navegadores compartido entre bancos
+NAVEGADORES_POOL = int(os.getenv("NAVEGADORES_POOL", "1"))
+RECICLAR_NAVEGADOR_CADA = int(os.getenv("RECICLAR_NAVEGADOR_CADA", "20"))
+
+# Procesamiento post-descarga (validación, hash y conversión en pool de procesos)
+POST_DESCARGA_WORKERS = int(os.getenv("POST_DESCARGA_WORKERS", "2"))
+POST_DESCARGA_MAX_PENDIENTES = int(os.getenv("POST_DESCARGA_MAX_PENDIENTES", "8"))
+CONVERTIR_EXTRACTOS = os.getenv("CONVERTIR_EXTRACTOS", "false").lower() in ("1", "true", "si")
+
+# Normalización de extractos al dataset Parquet del período
+NORMALIZAR_EXTRACTOS = os.getenv("NORMALIZAR_EXTRACTOS", "false").lower() in ("1", "true", "si")
+
+# Tracing de Playwright en anillo (0 = desactivado); se persiste ante error o paso lento
+TRAZAS_PASOS = int(os.getenv("TRAZAS_PASOS", "0"))
+TRAZAS_UMBRAL_MS = float(os.getenv("TRAZAS_UMBRAL_MS", "0")) or None
+
+# Timeouts adaptativos por (banco, target): percentil de las latencias observadas × factor, entre piso y techo
+TIMEOUT_ADAPTATIVO = os.getenv("TIMEOUT_ADAPTATIVO", "false").lower() in ("1", "true", "si")
+TIMEOUT_PERCENTIL = float(os.getenv("TIMEOUT_PERCENTIL", "99"))
+TIMEOUT_FACTOR = float(os.getenv("TIMEOUT_FACTOR", "2"))
+TIMEOUT_PISO_MS = int(os.getenv("TIMEOUT_PISO_MS", "2000"))
+TIMEOUT_TECHO_MS = int(os.getenv("TIMEOUT_TECHO_MS", "60000"))
+TIMEOUT_MIN_MUESTRAS = int(os.getenv("TIMEOUT_MIN_MUESTRAS", "5"))
+
+# Sharding en procesos: workers (0 = núcleos disponibles) y cuentas por shard (0 = banco completo)
+SHARD_PROCESOS = int(os.getenv("SHARD_PROCESOS", "0"))
+CUENTAS_POR_SHARD = int(os.getenv("CUENTAS_POR_SHARD", "0"))
+
+# Modo daemon: agenda de trabajos y puerto del endpoint local de control
+RUTA_AGENDA = os.getenv("RUTA_AGENDA", "agenda.json")
+DAEMON_PUERTO = int(os.getenv("DAEMON_PUERTO", "8765"))
+
 
 def get_credentials(bank_name: str):
     upper = bank_name.upper()
@@ -31,12 +68,35 @@ def get_credentials(bank_name: str):
 
 
 
-def load_flow(bank_name):
-    with open(f"flows/{bank_name}.json", "r", encoding="utf-8") as file:
+def get_pestanas_descarga(bank_name: str) -> int:
+    # Pestañas paralelas para la descarga por cuenta (opt-in por banco, ej. GNB_PESTANAS=3)
+    valor = os.getenv(f"{bank_name.upper()}_PESTANAS", "1")
+    try:
+        return max(1, int(valor))
+    except ValueError:
+        return 1
+
+
+@lru_cache(maxsize=32)
+def _leer_flow(ruta: str, mtime_ns: int):
+    with open(ruta, "r", encoding="utf-8") as file:
         return json.load(file)
 
 
+def load_flow(bank_name):
+    # Cacheado por fecha de modificación: un proceso largo (daemon) toma los cambios del JSON.
+    # El dict es compartido entre llamadas: no se debe modificar.
+    ruta = f"flows/{bank_name}.json"
+    return _leer_flow(ruta, os.stat(ruta).st_mtime_ns)
+
+
+def load_selectors_banco(bank_name):
+    return load_selectors().get(bank_name.lower())
+
+
+@lru_cache(maxsize=None)
 def load_selectors():
+    # Se arma una sola vez por proceso; compartido entre llamadas, no se debe modificar
 
     return {
         "continental": {
@@ -0,0 +1,78 @@
+"""
+Reporte de pasos `wait_time` en flows/*.json que pueden reemplazarse por
+esperas basadas en eventos (wait_stable, wait_network_idle, ...).
+
+Uso: python -m utils.flow_audit [--json]
+"""
+import glob
+import json
+import os
+import sys
+
+ACCIONES_CON_SELECTOR = ("click", "fill", "type", "buscar", "wait_for", "descargar_y_guardar", "seleccionar_opcion_dropdown")
+ACCIONES_NAVEGACION = ("goto", "click", "keyboard_press")
+ESPERA_DEPURACION_MS = 60000
+
+def _sugerir(anterior: dict, siguiente: dict, tiempo: int) -> tuple:
+    if tiempo >= ESPERA_DEPURACION_MS:
+        return None, "Pausa de depuración; eliminar o reemplazar por la espera real del paso siguiente."
+
+    if anterior and anterior.get("action") == "descargar_y_guardar":
+        return None, "La descarga ya se espera en 'descargar_y_guardar'; la pausa sobra."
+
+    if siguiente and siguiente.get("action") in ACCIONES_CON_SELECTOR and siguiente.get("target"):
+        return (
+            {"action": "wait_stable", "target": siguiente["target"]},
+            "El paso siguiente espera su selector; alcanza con que el elemento esté estable."
+        )
+
+    if anterior and anterior.get("action") in ACCIONES_NAVEGACION:
+        return (
+            {"action": "wait_network_idle"},
+            f"La pausa sigue a '{anterior.get('action')}'; esperar a que la red quede inactiva."
+        )
+
+    return None, "Sin patrón reconocible; revisar manualmente."
+
+def analizar_flows(flows_dir: str = "flows") -> list:
+    hallazgos = []
+    for ruta in sorted(glob.glob(os.path.join(flows_dir, "*.json"))):
+        banco = os.path.splitext(os.path.basename(ruta))[0]
+        with open(ruta, "r", encoding="utf-8") as file:
+            flow = json.load(file)
+
+        for fase, pasos in flow.items():
+            if not isinstance(pasos, list):
+                continue
+            for indice, paso in enumerate(pasos):
+                if paso.get("action") != "wait_time":
+                    continue
+                tiempo = int(paso.get("value") or 1000)
+                anterior = pasos[indice - 1] if indice > 0 else None
+                siguiente = pasos[indice + 1] if indice + 1 < len(pasos) else None
+                reemplazo, motivo = _sugerir(anterior, siguiente, tiempo)
+                hallazgos.append({
+                    "banco": banco,
+                    "fase": fase,
+                    "paso": indice,
+                    "ms": tiempo,
+                    "convertible": reemplazo is not None or tiempo >= ESPERA_DEPURACION_MS,
+                    "reemplazo": reemplazo,
+                    "motivo": motivo
+                })
+    return hallazgos
+
+def imprimir_reporte(hallazgos: list):
+    total_ms = sum(h["ms"] for h in hallazgos if h["convertible"])
+    for h in hallazgos:
+        marca = "✅" if h["convertible"] else "⚠️"
+        reemplazo = json.dumps(h["reemplazo"], ensure_ascii=False) if h["reemplazo"] else "-"
+        print(f"{marca} {h['banco']}.{h['fase']}[{h['paso']}] {h['ms']}ms -> {reemplazo} | {h['motivo']}")
+    print(f"\n📊 {len(hallazgos)} pasos wait_time, {total_ms}ms de pausa fija convertibles.")
+
+if __name__ == "__main__":
+    resultado = analizar_flows()
+    if "--json" in sys.argv:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    else:
+        imprimir_reporte(resultado)
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Perfil de tiempos de import (python -X importtime) de los módulos de arranque.
+# Uso: python -m utils.perfil_arranque [modulo ...] [--top 25] [--json]
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULOS_ARRANQUE = ["task.task_manager"]
+
+def perfilar_import(modulo: str) -> dict:
+    inicio = time.perf_counter()
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True
+    )
+    total_ms = (time.perf_counter() - inicio) * 1000
+
+    modulos = []
+    for linea in proceso.stderr.splitlines():
+        # Formato: "import time: self [us] | cumulative | imported package"
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        propio, acumulado, nombre = (parte.strip() for parte in linea[len("import time:"):].split("|"))
+        modulos.append({
+            "modulo": nombre.strip(),
+            "nivel": (len(nombre) - len(nombre.lstrip())) // 2,
+            "propio_ms": int(propio) / 1000,
+            "acumulado_ms": int(acumulado) / 1000,
+        })
+
+    raiz = next((m for m in reversed(modulos) if m["modulo"] == modulo), None)
+    return {
+        "modulo": modulo,
+        "ok": proceso.returncode == 0,
+        "error": proceso.stderr.strip().splitlines()[-1] if proceso.returncode else None,
+        "proceso_ms": round(total_ms, 1),
+        "import_ms": raiz["acumulado_ms"] if raiz else None,
+        "modulos_cargados": len(modulos),
+        "modulos": modulos,
+    }
+
+def _paquete_raiz(nombre: str) -> str:
+    return nombre.split(".")[0]
+
+def imprimir_reporte(perfil: dict, top: int):
+    estado = "✅" if perfil["ok"] else f"❌ {perfil['error']}"
+    print(f"\n📦 import {perfil['modulo']} {estado}")
+    print(f"   Proceso completo: {perfil['proceso_ms']:.0f} ms | import: {perfil['import_ms'] or 0:.0f} ms | módulos: {perfil['modulos_cargados']}")
+
+    por_paquete = {}
+    for modulo in perfil["modulos"]:
+        paquete = _paquete_raiz(modulo["modulo"])
+        por_paquete[paquete] = por_paquete.get(paquete, 0.0) + modulo["propio_ms"]
+    print("\n   Paquetes con más tiempo propio:")
+    for paquete, ms in sorted(por_paquete.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"   {ms:>9.1f} ms  {paquete}")
+
+    print("\n   Imports de primer nivel (acumulado):")
+    primer_nivel = [m for m in perfil["modulos"] if m["nivel"] <= 1]
+    for modulo in sorted(primer_nivel, key=lambda m: m["acumulado_ms"], reverse=True)[:top]:
+        print(f"   {modulo['acumulado_ms']:>9.1f} ms  {modulo['modulo']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perfil de tiempos de import del arranque")
+    parser.add_argument("modulos", nargs="*", default=MODULOS_ARRANQUE)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="Salida JSON sin el detalle por módulo")
+    args = parser.parse_args()
+
+    perfiles = [perfilar_import(modulo) for modulo in args.modulos]
+    if args.json:
+        print(json.dumps([{k: v for k, v in p.items() if k != "modulos"} for p in perfiles], ensure_ascii=False, indent=2))
+    else:
+        for perfil in perfiles:
+            imprimir_reporte(perfil, args.top)